@@ -1,35 +1,27 @@
-from queue import PriorityQueue
-
-def manhattan_heuristic(pos, goal):
-    return abs(pos[0] - goal[0]) + abs(pos[1] - goal[1])
-
-def astar(problem, heuristic=manhattan_heuristic):
-    frontiera = PriorityQueue()
-    start = problem.init
-    goal = problem.goal
-
-    frontiera.put((0, 0, start, [start]))  # (f(n), g(n), stato, percorso)
-    visited = {}
-    explored = []
-
-    while not frontiera.empty():
-        f, g, current, path = frontiera.get()
-
-        if current in visited and visited[current] <= g:
-            continue
-
-        visited[current] = g
-        explored.append(current)
-
-        if problem.isGoal(current):
-            return path, explored
-
-        for successor, step_cost in problem.getSuccessors(current):
-            g_new = g + step_cost
-            h = heuristic(successor, goal)
-            f_new = g_new + h
-
-            if successor not in visited or g_new < visited.get(successor, float('inf')):
-                frontiera.put((f_new, g_new, successor, path + [successor]))
-
-    return [], explored
+from frontier import HeapFrontier
+from heuristics import make_heuristic
+from search_algorithm import GraphSearch
+
+class AStar(GraphSearch):
+    """
+    A* con euristica scelta per nome (vedi heuristics.HEURISTICS) o passata come funzione.
+    Con weight > 1 diventa weighted A* (f = g + w·h): meno espansioni, costo al più w volte l'ottimo.
+    """
+    def __init__(self, heuristic="chebyshev", frontier=HeapFrontier, weight=1.0, view=False):
+        super().__init__(view)
+        self.heuristic = heuristic
+        self.frontier = frontier
+        self.weight = weight
+
+    def new_frontier(self):
+        return self.frontier()
+
+    def priority(self, node, problem):
+        return node.g + self.weight * self.h(node.state, problem.goal)  # f(n) = g(n) + w·h(n)
+
+    def solve_nearest(self, problem, k=1):
+        self.h = make_heuristic(self.heuristic, problem)  # con più goal: il minimo sui goal
+        return super().solve_nearest(problem, k)
+
+def astar(problem, heuristic="chebyshev", weight=1.0, frontier=HeapFrontier):
+    return AStar(heuristic, frontier, weight).solve(problem)
@@ -0,0 +1,260 @@
+from collections import OrderedDict
+
+from components import unreachable
+from heuristics import ADMISSIBLE
+from search_stats import SearchStats
+
+# Registro degli algoritmi per nome, senza dipendenze dalla GUI: ogni voce riceve
+# (problem, heuristic, weight, stats) e restituisce (percorso, esplorati), riempiendo stats.
+# Gli import sono dentro le funzioni come in PathfindingGUI._run_pathfinding.
+
+def _solve(search, problem, stats):
+    search.stats = stats
+    return search.solve(problem)
+
+def _dfs(problem, heuristic, weight, stats):
+    from dfs_migliorato import DFS
+    return _solve(DFS(), problem, stats)
+
+def _bfs(problem, heuristic, weight, stats):
+    from bfs import BFS
+    return _solve(BFS(), problem, stats)
+
+def _ucs(problem, heuristic, weight, stats):
+    from ucs import UCS
+    return _solve(UCS(), problem, stats)
+
+def _astar(problem, heuristic, weight, stats):
+    from a_star import AStar
+    return _solve(AStar(heuristic, weight=weight), problem, stats)
+
+def _jps(problem, heuristic, weight, stats):
+    from jps import JPS
+    return _solve(JPS(heuristic, weight=weight), problem, stats)
+
+def _bi_astar(problem, heuristic, weight, stats):
+    from bidirectional import BidirectionalSearch
+    return _solve(BidirectionalSearch(heuristic), problem, stats)
+
+def _bi_ucs(problem, heuristic, weight, stats):
+    from bidirectional import BidirectionalSearch
+    return _solve(BidirectionalSearch(), problem, stats)
+
+def _ara(problem, heuristic, weight, stats, time_limit=None, max_expansions=None):
+    from ara_star import ARAStar
+    # il peso è quello di partenza: con 1 (il default di run) si parte da ARAStar.DEFAULT_WEIGHT
+    search = ARAStar(heuristic, weight if weight > 1 else ARAStar.DEFAULT_WEIGHT,
+                     time_limit=time_limit, max_expansions=max_expansions)
+    return _solve(search, problem, stats)
+
+def _ida(problem, heuristic, weight, stats, time_limit=None, max_expansions=None):
+    from ida_star import IDAStar
+    search = IDAStar(heuristic, time_limit=time_limit, max_expansions=max_expansions)
+    return _solve(search, problem, stats)
+
+def _sma(problem, heuristic, weight, stats, time_limit=None, max_expansions=None, node_budget=None):
+    from sma_star import SMAStar
+    search = SMAStar(heuristic, SMAStar.DEFAULT_BUDGET if node_budget is None else node_budget,
+                     time_limit=time_limit, max_expansions=max_expansions)
+    return _solve(search, problem, stats)
+
+def _wave_bfs(problem, heuristic, weight, stats):
+    from wavefront import Wavefront
+    return _solve(Wavefront(unit=True), problem, stats)
+
+def _wave_ucs(problem, heuristic, weight, stats):
+    from wavefront import Wavefront
+    return _solve(Wavefront(), problem, stats)
+
+# Astrazioni HPA* e pianificatori D* Lite riusati tra le chiamate di run, come fa la GUI:
+# per ogni griglia si tiene l'oggetto con una copia delle celle e alla chiamata successiva le
+# celle cambiate si trovano confrontandola con la griglia e si passano a update. Restano solo
+# gli ultimi MAX_REUSED oggetti.
+MAX_REUSED = 4
+_reused = OrderedDict()  # chiave -> (griglia, copia delle celle, oggetto)
+
+def _changed_cells(grid, cells):
+    import numpy as np
+    changed = np.flatnonzero(np.frombuffer(grid.cells, dtype=np.uint8) != np.frombuffer(cells, dtype=np.uint8))
+    x, y = np.divmod(changed, grid.y_lim)
+    return list(zip(x.tolist(), y.tolist()))
+
+def _reuse(key, grid, update, build):
+    """
+    L'oggetto tenuto per key su grid, aggiornato con update(oggetto, celle cambiate), oppure
+    build() se non c'è, la griglia è un'altra o update restituisce False
+    """
+    entry = _reused.pop(key, None)
+    item = None
+    if entry is not None and entry[0] is grid and len(entry[1]) == len(grid.cells):
+        _, cells, item = entry
+        changed = _changed_cells(grid, cells) if grid.cells != cells else []
+        if update(item, changed):
+            if changed:
+                cells = bytes(grid.cells)
+        else:
+            item = None
+    if item is None:
+        item = build()
+        cells = bytes(grid.cells)
+    _reused[key] = (grid, cells, item)
+    while len(_reused) > MAX_REUSED:
+        _reused.popitem(last=False)
+    return item
+
+def _hpa(problem, heuristic, weight, stats):
+    from hpa import HierarchicalMap
+    grid, cost_by_code = problem.grid, problem.cost_by_code
+
+    def update(hmap, changed):
+        if hmap.cost_by_code != cost_by_code:
+            return False  # costi cambiati o terreni nuovi: si ricostruisce tutto
+        if changed:
+            hmap.update(grid, changed)
+        return True
+
+    hmap = _reuse(("HPA*", id(grid)), grid, update, lambda: HierarchicalMap(grid, cost_by_code))
+    hmap.stats = stats  # conta la query, non la costruzione dell'astrazione
+    return hmap.search(problem)
+
+def _dstar_lite(problem, heuristic, weight, stats):
+    from dstar_lite import DStarLite
+    grid, cost_by_code = problem.grid, problem.cost_by_code
+    # un pianificatore per (griglia, start, goal): dopo delle modifiche ripara solo ciò che cambia
+    planner = _reuse(("D*LITE", id(grid), problem.init, problem.goal), grid,
+                     lambda dstar, changed: dstar.update_cells(grid, changed) and dstar.update_costs(cost_by_code),
+                     lambda: DStarLite(problem))
+    planner.stats = stats
+    return planner.plan()
+
+def _flow(problem, heuristic, weight, stats):
+    from dijkstra import FlowField
+    field = FlowField(problem, stats=stats)
+    return field.path(problem.init), field.reached()
+
+ALGORITHMS = {
+    "A*": _astar,
+    "BFS": _bfs,
+    "DFS": _dfs,
+    "UCS": _ucs,
+    "JPS": _jps,
+    "BI-A*": _bi_astar,
+    "BI-UCS": _bi_ucs,
+    "HPA*": _hpa,
+    "D*LITE": _dstar_lite,
+    "FLOW": _flow,
+    "ARA*": _ara,
+    "IDA*": _ida,
+    "SMA*": _sma,
+    "NP-BFS": _wave_bfs,
+    "NP-UCS": _wave_ucs,
+}
+# algoritmi che usano euristica e peso (gli altri li ignorano)
+USES_HEURISTIC = {"A*", "JPS", "BI-A*", "ARA*", "IDA*", "SMA*"}
+USES_WEIGHT = {"A*", "JPS", "ARA*"}
+# algoritmi anytime: accettano un budget (time_limit, max_expansions) e notificano "improve"
+ANYTIME = {"ARA*"}
+# algoritmi che accettano un budget (time_limit, max_expansions) e lo segnano in
+# stats.out_of_budget quando lo esauriscono: gli anytime restituiscono il percorso migliore
+# trovato, gli altri nessuno
+BUDGETED = ANYTIME | {"IDA*", "SMA*"}
+# algoritmi a memoria limitata: accettano node_budget, il numero massimo di nodi in memoria
+MEMORY_BOUNDED = {"SMA*"}
+# algoritmi che accettano un problema con più goal (PathfindingProblem.goals) e trovano il
+# più vicino; quelli in NEAREST restituiscono anche i k più vicini da una sola ricerca
+MULTI_GOAL = {"A*", "BFS", "DFS", "UCS", "FLOW"}
+NEAREST = {"A*", "BFS", "UCS"}
+# algoritmi che leggono le celle della GridWorld in memoria: non valgono su un TiledWorld
+NEEDS_GRID = {"JPS", "HPA*", "D*LITE", "FLOW", "NP-BFS", "NP-UCS"}
+
+def options(algorithm, heuristic="chebyshev", weight=1.0):
+    """Solo le opzioni che influenzano il risultato dell'algoritmo (parte della chiave della cache)"""
+    return (heuristic if algorithm in USES_HEURISTIC else None,
+            float(weight) if algorithm in USES_WEIGHT else None)
+
+def is_optimal(algorithm, heuristic="chebyshev", weight=1.0):
+    """True se l'algoritmo restituisce sempre un percorso di costo minimo"""
+    if algorithm in ("UCS", "BI-UCS", "D*LITE", "FLOW", "NP-UCS"):
+        return True
+    if algorithm in ANYTIME:
+        return heuristic in ADMISSIBLE  # senza budget arriva fino a peso 1
+    if algorithm in USES_HEURISTIC:
+        return heuristic in ADMISSIBLE and (algorithm not in USES_WEIGHT or weight == 1)
+    return False
+
+def run(problem, algorithm, heuristic="chebyshev", weight=1.0, cache=None, stats=None,
+        time_limit=None, max_expansions=None, node_budget=None):
+    """
+    Risolve problem con l'algoritmo scelto per nome: (percorso, esplorati).
+    Con una PathCache le query già viste non rieseguono la ricerca (e stats resta a zero).
+    stats è un SearchStats da riempire, magari con degli osservatori iscritti.
+    time_limit (secondi) e max_expansions valgono solo per gli algoritmi BUDGETED: gli ANYTIME
+    restituiscono il percorso migliore trovato entro il budget, gli altri nessun percorso se
+    lo esauriscono; con un budget la cache non si usa, perché il risultato dipende dal tempo
+    disponibile.
+    Se start e goal sono in componenti connesse diverse della griglia non si cerca: ([], []).
+    node_budget vale solo per gli algoritmi MEMORY_BOUNDED e, come gli altri budget,
+    salta la cache: con pochi nodi gli esplorati cambiano e il percorso può mancare.
+    Un problema con più goal vale solo per gli algoritmi MULTI_GOAL e non usa la cache.
+    Su un mondo senza GridWorld (TiledWorld) non valgono gli algoritmi NEEDS_GRID né
+    l'euristica ALT, e la cache non si usa: la sua chiave è l'impronta di tutte le celle.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Algoritmo sconosciuto: {algorithm}")
+    if getattr(problem, "grid", None) is None:
+        if algorithm in NEEDS_GRID:
+            raise ValueError(f"{algorithm} richiede una GridWorld in memoria")
+        if heuristic == "alt" and algorithm in USES_HEURISTIC:
+            raise ValueError("L'euristica ALT richiede una GridWorld in memoria")
+        cache = None
+    if stats is None:
+        stats = SearchStats()
+    if len(getattr(problem, "goals", ())) > 1:
+        if algorithm not in MULTI_GOAL:
+            raise ValueError(f"{algorithm} non accetta più goal")
+        cache = None
+    if unreachable(problem):
+        stats.start()
+        stats.stop()
+        return [], []
+    budget = {}
+    if time_limit is not None or max_expansions is not None:
+        if algorithm not in BUDGETED:
+            raise ValueError(f"{algorithm} non accetta un budget")
+        budget.update(time_limit=time_limit, max_expansions=max_expansions)
+    if node_budget is not None:
+        if algorithm not in MEMORY_BOUNDED:
+            raise ValueError(f"{algorithm} non accetta un budget di nodi")
+        budget["node_budget"] = node_budget
+    if budget:
+        return ALGORITHMS[algorithm](problem, heuristic, weight, stats, **budget)
+    if cache is not None:
+        stats.start()
+        cached = cache.get(problem, algorithm, heuristic, weight)
+        if cached is not None:
+            stats.stop()
+            return cached
+    path, explored = ALGORITHMS[algorithm](problem, heuristic, weight, stats)
+    if cache is not None:
+        cache.put(problem, algorithm, heuristic, weight, path, explored)
+    return path, explored
+
+def nearest(problem, algorithm, k, heuristic="chebyshev", weight=1.0, stats=None):
+    """
+    I k goal di problem più vicini allo start, da una sola ricerca: (percorsi, esplorati) con
+    i percorsi in ordine di costo (di mosse per BFS; con A* pesato l'ordine non è garantito)
+    """
+    if algorithm not in NEAREST:
+        raise ValueError(f"{algorithm} non restituisce i goal più vicini")
+    if algorithm == "A*":
+        from a_star import AStar
+        search = AStar(heuristic, weight=weight)
+    elif algorithm == "UCS":
+        from ucs import UCS
+        search = UCS()
+    else:
+        from bfs import BFS
+        search = BFS()
+    if stats is not None:
+        search.stats = stats
+    return search.solve_nearest(problem, k)
@@ -0,0 +1,160 @@
+import time
+from heapq import heapify, heappush, heappop
+from itertools import count
+
+from heuristics import make_heuristic
+from search_algorithm import SearchAlgorithm
+
+INF = float('inf')
+
+# ARA* (Anytime Repairing A*): una serie di weighted A* con peso che scende verso 1,
+# dove ogni iterazione riparte da g e genitori della precedente invece che da zero.
+# Uno stato migliorato dopo essere stato espanso nell'iterazione corrente va in INCONS
+# e torna in OPEN solo all'iterazione successiva, così ogni iterazione espande ogni stato
+# al più una volta. Dopo ogni iterazione il percorso trovato costa al più bound volte
+# l'ottimo, con bound = min(peso, costo / min(g + h) su OPEN e INCONS).
+# Con un budget (secondi o espansioni) la ricerca si ferma e restituisce il percorso migliore
+# trovato fino a quel momento. Ogni miglioramento si notifica agli osservatori di stats
+# con l'evento "improve" e lo stato (percorso, costo, bound); se il budget finisce prima
+# dell'ottimo la ricerca lo segna in stats.out_of_budget.
+
+class ARAStar(SearchAlgorithm):
+    DEFAULT_WEIGHT = 3.0
+
+    def __init__(self, heuristic="chebyshev", weight=DEFAULT_WEIGHT, step=0.5,
+                 time_limit=None, max_expansions=None, view=False) -> None:
+        super().__init__(view)
+        self.heuristic = heuristic
+        self.weight = weight                  # peso iniziale dell'euristica
+        self.step = step                      # di quanto scende il peso a ogni iterazione
+        self.time_limit = time_limit          # secondi, None = nessun limite
+        self.max_expansions = max_expansions  # espansioni totali, None = nessun limite
+        self.solutions = []  # (costo, bound, peso, espansioni, ms) per ogni miglioramento
+        self.bound = INF     # fattore di subottimalità del percorso restituito (1 = ottimo)
+
+    def solve(self, problem):
+        """Restituisce (percorso, esplorati): il percorso migliore trovato entro il budget"""
+        stats = self.stats
+        stats.start()
+        observers = stats.observers
+        start_time = time.perf_counter()
+        deadline = None if self.time_limit is None else start_time + self.time_limit
+        max_expansions = self.max_expansions
+        self.solutions = []
+        self.bound = INF
+
+        heuristic = make_heuristic(self.heuristic, problem)
+        goal = problem.goal
+        h_cache = {}
+
+        def h(state):
+            value = h_cache.get(state)
+            if value is None:
+                value = h_cache[state] = heuristic(state, goal)
+            return value
+
+        init = problem.init
+        g = {init: 0}
+        parent = {init: None}
+        open_states = {init}
+        incons = set()
+        closed = set()
+        counter = count()
+        weight = max(1.0, self.weight)
+        heap = [(weight * h(init), 0, next(counter), init)]
+        explored = []
+        best_path, best_cost = [], INF
+        pushes, pops, stale, generated = 1, 0, 0, 0
+        peak_frontier, peak_closed = 1, 0
+        out_of_budget = False
+
+        while True:
+            # ImprovePath: weighted A* finché nessuno stato in OPEN ha f minore di g(goal)
+            while heap:
+                f, gs, _, state = heap[0]
+                if state not in open_states or gs != g[state]:
+                    heappop(heap)
+                    stale += 1
+                    continue
+                if f >= g.get(goal, INF):
+                    break
+                if ((max_expansions is not None and len(explored) >= max_expansions)
+                        or (deadline is not None and not len(explored) & 255
+                            and time.perf_counter() > deadline)):
+                    out_of_budget = True
+                    break
+                heappop(heap)
+                pops += 1
+                open_states.discard(state)
+                closed.add(state)
+                explored.append(state)
+                self.update_expanded(state)
+                if observers:
+                    stats.notify("expand", state)
+
+                successors = problem.getSuccessors(state)
+                generated += len(successors)
+                for successor, step_cost in successors:
+                    new_g = gs + step_cost
+                    if new_g < g.get(successor, INF):
+                        g[successor] = new_g
+                        parent[successor] = state
+                        if successor in closed:
+                            incons.add(successor)
+                        else:
+                            open_states.add(successor)
+                            heappush(heap, (new_g + weight * h(successor), new_g, next(counter), successor))
+                            pushes += 1
+                if len(open_states) > peak_frontier:
+                    peak_frontier = len(open_states)
+                if len(closed) > peak_closed:
+                    peak_closed = len(closed)
+
+            goal_cost = g.get(goal, INF)
+            if out_of_budget or goal_cost == INF:
+                break
+
+            # i genitori possono essere migliorati dopo il goal: il percorso costa al più g(goal)
+            path = self._path(parent, goal)
+            cost = sum(problem.stepCost(state) for state in path[1:])
+            # bound dell'iterazione: l'ottimo è almeno il minimo di g + h sugli stati non consistenti
+            lower = min((g[s] + h(s) for s in open_states | incons), default=goal_cost)
+            bound = min(weight, cost / lower) if lower > 0 else 1.0
+            if cost < best_cost or bound < self.bound:
+                if cost < best_cost:
+                    best_path, best_cost = path, cost
+                self.bound = bound
+                self.solutions.append((best_cost, bound, weight, len(explored),
+                                       (time.perf_counter() - start_time) * 1000))
+                if observers:
+                    stats.notify("improve", (best_path, best_cost, bound))
+            if bound <= 1:
+                break
+
+            # peso più basso, INCONS torna in OPEN con le nuove priorità, CLOSED si svuota
+            weight = max(1.0, min(weight - self.step, bound))
+            open_states |= incons
+            incons = set()
+            closed = set()
+            heap = [(g[s] + weight * h(s), g[s], next(counter), s) for s in open_states]
+            heapify(heap)
+
+        stats.out_of_budget = out_of_budget
+        stats.pushes, stats.pops, stats.stale, stats.generated = pushes, pops, stale, generated
+        stats.expanded = len(explored)
+        stats.peak_frontier, stats.peak_closed = peak_frontier, peak_closed
+        stats.stop()
+        return best_path, explored
+
+    @staticmethod
+    def _path(parent, goal):
+        path = []
+        state = goal
+        while state is not None:
+            path.append(state)
+            state = parent[state]
+        path.reverse()
+        return path
+
+def ara_star(problem, heuristic="chebyshev", weight=ARAStar.DEFAULT_WEIGHT, time_limit=None, max_expansions=None):
+    return ARAStar(heuristic, weight, time_limit=time_limit, max_expansions=max_expansions).solve(problem)
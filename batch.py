@@ -0,0 +1,98 @@
+import mmap
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from algorithms import USES_HEURISTIC, run
+from pathfinding_problem import PathfindingProblem, as_goal
+from search_stats import SearchStats
+from world import World, GridWorld
+
+# Risoluzione in parallelo di molte query (start, goal) sullo stesso mondo.
+# Le celle della GridWorld si scrivono una volta in un file temporaneo che ogni processo del
+# pool mappa in sola lettura nell'initializer: le pagine sono condivise dal sistema operativo
+# tra tutti i processi e la GridWorld di ogni processo usa direttamente la mappa (un mmap si
+# indicizza e supporta find come il bytearray). A ogni task si passano solo le query.
+# I risultati tornano in ordine di completamento, con le metriche della singola query.
+
+_worker = {}  # stato del processo del pool: mondo mappato e parametri
+
+def _init_worker(cells_path, x_lim, y_lim, terrain_names, costs, algorithm, heuristic, weight, landmarks,
+                 budget, trace_memory):
+    with open(cells_path, "rb") as f:
+        cells = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    grid = GridWorld(x_lim, y_lim, cells, terrain_names)
+    if landmarks is not None:
+        import landmarks as alt
+        alt._tables[landmarks.key] = landmarks
+    _worker.update(world=World.from_grid(grid), costs=costs,
+                   algorithm=algorithm, heuristic=heuristic, weight=weight, budget=budget,
+                   trace_memory=trace_memory)
+
+def _solve_chunk(chunk):
+    """Risolve nel processo del pool una lista di (indice, start, goal)"""
+    world, costs = _worker["world"], _worker["costs"]
+    results = []
+    for index, start, goal in chunk:
+        problem = PathfindingProblem(world, start, goal, costs)
+        stats = SearchStats(trace_memory=_worker["trace_memory"])
+        t0 = time.perf_counter_ns()
+        path, explored = run(problem, _worker["algorithm"], _worker["heuristic"], _worker["weight"],
+                             stats=stats, **_worker["budget"])
+        elapsed = time.perf_counter_ns() - t0
+        results.append({
+            "index": index,
+            "start": start,
+            "goal": problem.goal if problem.goal is not None else (path[-1] if path else None),
+            "found": bool(path),
+            "cost": sum(problem.stepCost(state) for state in path[1:]) if path else None,
+            "length": len(path),
+            "path": path,
+            "time_ms": elapsed / 1e6,
+            "stats": stats.as_dict(),
+            "pid": os.getpid(),
+        })
+    return results
+
+def solve_batch(world, costs, queries, algorithm="A*", heuristic="chebyshev", weight=1.0,
+                workers=None, chunksize=1, time_limit=None, max_expansions=None, node_budget=None,
+                trace_memory=False, landmarks_path=None):
+    """
+    Risolve le query [(start, goal)] su world con un ProcessPoolExecutor; goal può essere
+    anche una collezione di celle (si cerca la più vicina, vedi PathfindingProblem).
+    time_limit e max_expansions sono il budget di ogni query per gli algoritmi BUDGETED,
+    node_budget quello degli algoritmi a memoria limitata (run); con trace_memory le stats
+    di ogni query hanno anche il picco di memoria. Con l'euristica alt le tabelle dei landmark
+    si leggono da landmarks_path, se c'è, o vi si salvano dopo averle calcolate.
+    È un generatore: restituisce un dict per query (index nella lista, start, goal, found, cost,
+    length, path, time_ms, stats di SearchStats, pid) appena il suo gruppo di chunksize query
+    è completato. Con più goal, goal è quello raggiunto.
+    """
+    grid = world.grid
+    queries = [(i, tuple(start), as_goal(goal)) for i, (start, goal) in enumerate(queries)]
+    landmarks = None
+    if heuristic == "alt" and algorithm in USES_HEURISTIC and queries:
+        # le tabelle ALT si calcolano una volta qui e arrivano ai processi con l'initializer
+        from landmarks import get_landmarks
+        _, start, goal = queries[0]
+        landmarks = get_landmarks(PathfindingProblem(world, start, goal, costs), landmarks_path)
+
+    with tempfile.NamedTemporaryFile(suffix=".cells", delete=False) as f:
+        f.write(grid.cells)
+    try:
+        init_args = (f.name, grid.x_lim, grid.y_lim, grid.terrain_names[2:], dict(costs),
+                     algorithm, heuristic, weight, landmarks,
+                     {"time_limit": time_limit, "max_expansions": max_expansions,
+                      "node_budget": node_budget}, trace_memory)
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=init_args) as pool:
+            futures = [pool.submit(_solve_chunk, queries[i:i + chunksize])
+                       for i in range(0, len(queries), chunksize)]
+            try:
+                for future in as_completed(futures):
+                    yield from future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+    finally:
+        os.unlink(f.name)
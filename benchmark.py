@@ -0,0 +1,330 @@
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from a_star import AStar, astar
+from bfs import BFS
+from dfs_migliorato import DFS
+from dstar_lite import DStarLite
+from frontier import HeapFrontier, PriorityFrontier
+from pathfinding_problem import PathfindingProblem, DIRECTIONS
+from ucs import UCS
+from world import World, GridWorld, WALL
+
+TERRAINS = ["verde", "nero", "bianco", "blu"]
+COSTS = {"verde": 3, "nero": 2, "bianco": 1, "blu": 10}
+
+
+def random_sets(x_lim, y_lim, wall_ratio=0.2, seed=0):
+    """Muri e terreni casuali nella vecchia rappresentazione a set/dict"""
+    rnd = random.Random(seed)
+    walls = set()
+    terrain = {}
+    for x in range(x_lim):
+        for y in range(y_lim):
+            if rnd.random() < wall_ratio:
+                walls.add((x, y))
+            else:
+                terrain[(x, y)] = rnd.choice(TERRAINS)
+    return walls, terrain
+
+
+def _tuple_successors(walls, terrain, x_lim, y_lim, costs, state):
+    # getSuccessors originale, basato su set di tuple e dict
+    successors = []
+    for dx, dy in DIRECTIONS:
+        nx, ny = state[0] + dx, state[1] + dy
+        if 0 <= nx < x_lim and 0 <= ny < y_lim:
+            if (nx, ny) not in walls:
+                successors.append(((nx, ny), costs.get(terrain.get((nx, ny)), 1)))
+    return successors
+
+
+def compare_world(size=1000, samples=200000, seed=0):
+    """Confronta memoria e throughput di getSuccessors tra set/dict e GridWorld"""
+    walls, terrain = random_sets(size, size, seed=seed)
+
+    tracemalloc.start()
+    copy_walls, copy_terrain = set(walls), dict(terrain)
+    tuple_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del copy_walls, copy_terrain
+
+    tracemalloc.start()
+    grid = GridWorld.from_sets(size, size, walls, terrain)
+    grid_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    rnd = random.Random(seed)
+    states = [(rnd.randrange(size), rnd.randrange(size)) for _ in range(samples)]
+
+    start = time.perf_counter()
+    for state in states:
+        _tuple_successors(walls, terrain, size, size, COSTS, state)
+    tuple_rate = samples / (time.perf_counter() - start)
+
+    problem = PathfindingProblem(World.from_grid(grid), states[0], states[1], COSTS)
+    start = time.perf_counter()
+    for state in states:
+        problem.getSuccessors(state)
+    grid_rate = samples / (time.perf_counter() - start)
+
+    indices = [grid.index(x, y) for x, y in states]
+    start = time.perf_counter()
+    for i in indices:
+        problem.getSuccessorsIndex(i)
+    index_rate = samples / (time.perf_counter() - start)
+
+    print(f"Griglia {size}x{size}, {len(walls)} muri")
+    print(f"Memoria set/dict:  {tuple_bytes / 2**20:10.1f} MiB")
+    print(f"Memoria GridWorld: {grid_bytes / 2**20:10.1f} MiB")
+    print(f"getSuccessors set/dict:  {tuple_rate:12.0f} stati/s")
+    print(f"getSuccessors GridWorld: {grid_rate:12.0f} stati/s")
+    print(f"getSuccessorsIndex:      {index_rate:12.0f} stati/s")
+
+
+def compare_frontiers(size=300, seed=0):
+    """Espansioni al secondo di UCS e A* con PriorityFrontier (queue) e HeapFrontier (heapq)"""
+    walls, terrain = random_sets(size, size, seed=seed)
+    start, goal = (0, 0), (size - 1, size - 1)
+    walls -= {start, goal}
+    problem = PathfindingProblem(World(size, size, walls, terrain), start, goal, COSTS)
+    print(f"Griglia {size}x{size}, da {start} a {goal}")
+    for name, make in (("UCS", lambda f: UCS(f)), ("A*", lambda f: AStar(frontier=f))):
+        for frontier in (PriorityFrontier, HeapFrontier):
+            search = make(frontier)
+            t0 = time.perf_counter()
+            path, explored = search.solve(problem)
+            elapsed = time.perf_counter() - t0
+            print(f"{name:4} {frontier.__name__:17} espansi {len(explored):8} "
+                  f"in {elapsed * 1000:8.1f} ms = {len(explored) / elapsed:10.0f} espansioni/s")
+
+
+def compare_replanning(size=300, rounds=10, edits=5, on_path=True, seed=0):
+    """
+    Riparazione di D* Lite contro una nuova ricerca A* dopo poche celle modificate:
+    sul percorso corrente (caso peggiore) o in punti a caso della mappa.
+    """
+    walls, terrain = random_sets(size, size, seed=seed)
+    start, goal = (0, 0), (size - 1, size - 1)
+    walls -= {start, goal}
+    problem = PathfindingProblem(World(size, size, walls, terrain), start, goal, COSTS)
+    grid = problem.grid
+    rnd = random.Random(seed)
+
+    t0 = time.perf_counter()
+    planner = DStarLite(problem)
+    path, _ = planner.plan()
+    print(f"Griglia {size}x{size}, modifiche {'sul percorso' if on_path else 'a caso'}, "
+          f"prima pianificazione D* Lite {(time.perf_counter() - t0) * 1000:.1f} ms")
+    repair_total = full_total = 0
+    for r in range(rounds):
+        changed = []
+        for _ in range(edits):
+            if on_path and len(path) > 2:
+                x, y = rnd.choice(path[1:-1])
+            else:
+                x, y = rnd.randrange(size), rnd.randrange(size)
+                if (x, y) in (start, goal):
+                    continue
+            grid.set_cell(x, y, None if rnd.random() < 0.5 else rnd.choice(TERRAINS))
+            changed.append((x, y))
+        t0 = time.perf_counter()
+        planner.update_cells(grid, changed)
+        path, repaired = planner.plan()
+        repair = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        full_path, explored = astar(PathfindingProblem(World.from_grid(grid), start, goal, COSTS))
+        full = time.perf_counter() - t0
+        repair_total += repair
+        full_total += full
+        print(f"giro {r}: riparazione {repair * 1000:8.1f} ms ({len(repaired):6} espansi), "
+              f"A* da zero {full * 1000:8.1f} ms ({len(explored):6} espansi)")
+    print(f"media: riparazione {repair_total / rounds * 1000:.1f} ms, A* da zero {full_total / rounds * 1000:.1f} ms")
+
+
+# === SUITE RIPRODUCIBILE ===
+# Mappe generate da un seed (terreni casuali, labirinti, campi aperti, griglie grandi) o
+# salvate dalla GUI; per ogni mappa e algoritmo si misurano tempo, espansioni, frontiera
+# massima, memoria di picco e costo del percorso. I risultati vanno in JSON e si possono
+# confrontare con una baseline salvata.
+SUITE_ALGORITHMS = {"A*": AStar, "UCS": UCS, "BFS": BFS, "DFS": DFS}
+
+
+def random_map(size, seed=0, wall_ratio=0.2):
+    """Muri e i quattro terreni della GUI mescolati a caso"""
+    rnd = random.Random(seed)
+    grid = GridWorld(size, size, None, TERRAINS)
+    codes = [WALL] + [grid.terrain_codes[t] for t in TERRAINS]
+    weights = [wall_ratio] + [(1 - wall_ratio) / len(TERRAINS)] * len(TERRAINS)
+    grid.cells[:] = bytes(rnd.choices(codes, weights, k=size * size))
+    return grid
+
+
+def maze_map(size, seed=0):
+    """Labirinto perfetto (backtracking iterativo) sulle celle di coordinate dispari"""
+    rnd = random.Random(seed)
+    grid = GridWorld(size, size, None, TERRAINS)
+    codes = [grid.terrain_codes[t] for t in TERRAINS]
+    cells = grid.cells
+    cells[1 * size + 1] = rnd.choice(codes)
+    stack = [(1, 1)]
+    while stack:
+        x, y = stack[-1]
+        options = [(x + dx, y + dy, dx // 2, dy // 2) for dx, dy in ((-2, 0), (2, 0), (0, -2), (0, 2))
+                   if 0 < x + dx < size - 1 and 0 < y + dy < size - 1 and not cells[(x + dx) * size + y + dy]]
+        if not options:
+            stack.pop()
+            continue
+        nx, ny, dx, dy = rnd.choice(options)
+        cells[(x + dx) * size + y + dy] = rnd.choice(codes)
+        cells[nx * size + ny] = rnd.choice(codes)
+        stack.append((nx, ny))
+    return grid
+
+
+def open_map(size, seed=0):
+    """Campo aperto senza muri: "bianco" con macchie rettangolari degli altri terreni"""
+    rnd = random.Random(seed)
+    grid = GridWorld(size, size, None, TERRAINS)
+    grid.cells[:] = bytes([grid.terrain_codes["bianco"]]) * (size * size)
+    for _ in range(size // 10):
+        code = grid.terrain_codes[rnd.choice(TERRAINS)]
+        x, y = rnd.randrange(size), rnd.randrange(size)
+        h, w = rnd.randint(1, size // 5 + 1), rnd.randint(1, size // 5 + 1)
+        for row in range(x, min(x + h, size)):
+            grid.cells[row * size + y:row * size + min(y + w, size)] = bytes([code]) * (min(y + w, size) - y)
+    return grid
+
+
+def _corners(grid):
+    """Start e goal negli angoli opposti, resi liberi"""
+    grid.set_cell(0, 0, "bianco")
+    grid.set_cell(grid.x_lim - 1, grid.y_lim - 1, "bianco")
+    return (0, 0), (grid.x_lim - 1, grid.y_lim - 1)
+
+
+def suite_maps(large=1000, seed=0):
+    """Mappe della suite: (nome, GridWorld, costi, start, goal)"""
+    maps = []
+    for name, grid in (("random-200", random_map(200, seed)),
+                       ("maze-201", maze_map(201, seed)),
+                       ("open-300", open_map(300, seed)),
+                       (f"random-{large}", random_map(large, seed))):
+        maps.append((name, grid, COSTS) + _corners(grid))
+    return maps
+
+
+def saved_map(path):
+    """Mappa salvata dalla GUI: start e goal sono la prima e l'ultima cella libera"""
+    from map_io import load_map
+    grid, costs = load_map(path)
+    free = [i for i, code in enumerate(grid.cells) if code]
+    if not free:
+        raise ValueError(f"{path}: nessuna cella libera")
+    return (path, grid, costs, grid.coords(free[0]), grid.coords(free[-1]))
+
+
+def run_suite(maps, algorithms=tuple(SUITE_ALGORITHMS), repeat=1, memory=True):
+    """
+    Esegue ogni algoritmo su ogni mappa. Il tempo è il migliore su repeat esecuzioni;
+    la memoria di picco (tracemalloc) si misura in un'esecuzione a parte, che tracemalloc rallenta.
+    Gli altri contatori sono quelli di SearchStats.
+    """
+    results = []
+    for name, grid, costs, start, goal in maps:
+        problem = PathfindingProblem(World.from_grid(grid), start, goal, costs)
+        grid.components  # le componenti connesse si calcolano fuori dalle misure
+        for algorithm in algorithms:
+            best = float('inf')
+            for _ in range(repeat):
+                search = SUITE_ALGORITHMS[algorithm]()
+                t0 = time.perf_counter()
+                path, explored = search.solve(problem)
+                best = min(best, time.perf_counter() - t0)
+            stats = search.stats
+            row = {
+                "map": name,
+                "size": [grid.x_lim, grid.y_lim],
+                "algorithm": algorithm,
+                "time_ms": round(best * 1000, 3),
+                "expanded": stats.expanded,
+                "pushes": stats.pushes,
+                "pops": stats.pops,
+                "stale": stats.stale,
+                "generated": stats.generated,
+                "peak_frontier": stats.peak_frontier,
+                "peak_closed": stats.peak_closed,
+                "cost": sum(problem.stepCost(state) for state in path[1:]) if path else None,
+                "path_length": len(path),
+            }
+            if memory:
+                search = SUITE_ALGORITHMS[algorithm]()
+                search.stats.trace_memory = True
+                search.solve(problem)
+                row["peak_memory_kib"] = round(search.stats.peak_memory / 1024, 1)
+            print(f"{name:14} {algorithm:4} {row['time_ms']:10.1f} ms  espansi {row['expanded']:8}  "
+                  f"frontiera {row['peak_frontier']:7}  costo {row['cost']}")
+            results.append(row)
+    return results
+
+
+def save_results(path, results, seed=0):
+    meta = {"python": platform.python_version(), "platform": platform.platform(),
+            "seed": seed, "date": time.strftime("%Y-%m-%d %H:%M:%S")}
+    with open(path, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=1)
+
+
+def compare_results(baseline, current, threshold=0.10):
+    """
+    Confronta due file di risultati: segnala i rallentamenti oltre la soglia relativa e
+    i cambi di espansioni o di costo. Restituisce la lista delle segnalazioni.
+    """
+    with open(baseline) as f:
+        old = {(r["map"], r["algorithm"]): r for r in json.load(f)["results"]}
+    with open(current) as f:
+        new = json.load(f)["results"]
+    flagged = []
+    for row in new:
+        base = old.get((row["map"], row["algorithm"]))
+        if base is None:
+            continue
+        ratio = row["time_ms"] / base["time_ms"] if base["time_ms"] else 1.0
+        notes = []
+        if ratio > 1 + threshold:
+            notes.append(f"più lento x{ratio:.2f}")
+        if row["expanded"] != base["expanded"]:
+            notes.append(f"espansi {base['expanded']} -> {row['expanded']}")
+        if row["cost"] != base["cost"]:
+            notes.append(f"costo {base['cost']} -> {row['cost']}")
+        print(f"{row['map']:14} {row['algorithm']:4} {base['time_ms']:10.1f} -> {row['time_ms']:10.1f} ms  "
+              + ("; ".join(notes) if notes else "ok"))
+        if notes:
+            flagged.append((row["map"], row["algorithm"], notes))
+    return flagged
+
+
+if __name__ == "__main__":
+    mode = sys.argv[1] if len(sys.argv) > 1 else "world"
+    size = int(sys.argv[2]) if len(sys.argv) > 2 and mode not in ("suite", "compare") else None
+    if mode == "suite":
+        # python benchmark.py suite risultati.json [mappa.map ...]
+        out = sys.argv[2] if len(sys.argv) > 2 else "benchmark.json"
+        maps = suite_maps() + [saved_map(path) for path in sys.argv[3:]]
+        save_results(out, run_suite(maps))
+    elif mode == "compare":
+        # python benchmark.py compare baseline.json risultati.json [soglia]
+        threshold = float(sys.argv[4]) if len(sys.argv) > 4 else 0.10
+        if compare_results(sys.argv[2], sys.argv[3], threshold):
+            sys.exit(1)
+    elif mode == "frontier":
+        compare_frontiers(size or 300)
+    elif mode == "replan":
+        compare_replanning(size or 300, on_path=True)
+        compare_replanning(size or 300, on_path=False)
+    else:
+        compare_world(size or 1000)
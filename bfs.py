@@ -1,27 +1,11 @@
-from search_algorithm import SearchAlgorithm
-from queue import Queue 
-from search_algorithm import Node
+from frontier import QueueFrontier
+from search_algorithm import GraphSearch
 
-from queue import Queue
+class BFS(GraphSearch):
+    reopen = False  # ignora il costo: uno stato visto non si riapre
 
-def bfs(problem):
-    frontiera = Queue()
-    frontiera.put((problem.init, [problem.init]))  
-    visto = set()
-    explored = []
-
-    while not frontiera.empty():  
-        current, path = frontiera.get()
-        if current in visto:
-            continue
-        visto.add(current)
-        explored.append(current)
-
-        if problem.isGoal(current):
-            return path, explored
+    def new_frontier(self):
+        return QueueFrontier()
 
-        for successor, _ in problem.getSuccessors(current):  # ignora il costo
-            if successor not in visto:
-                frontiera.put((successor, path + [successor]))
-
-    return [], explored
+def bfs(problem):
+    return BFS().solve(problem)
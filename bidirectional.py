@@ -0,0 +1,114 @@
+from frontier import HeapFrontier
+from heuristics import make_heuristic, min_step_cost
+from search_algorithm import Node, SearchAlgorithm
+
+# Ricerca bidirezionale: una ricerca in avanti da problem.init e una all'indietro da problem.goal.
+# All'indietro si usano i predecessori (problem.getPredecessors): espandendo v, ogni vicino u
+# riceve g_b(u) = g_b(v) + costo(v), perché la mossa u -> v paga il terreno di v.
+# mu è il costo del miglior percorso completo trovato finora, aggiornato quando un lato
+# raggiunge uno stato che l'altro lato ha già raggiunto.
+# Con un'euristica si usano i potenziali medi: p(v) = (h(v, goal) - h_r(v, start)) / 2 in avanti
+# e -p(v) all'indietro, dove h_r stima il costo da start a v. Con h consistente i costi ridotti restano non negativi, quindi vale
+# lo stesso criterio di arresto della UCS bidirezionale: top_avanti + top_indietro >= mu.
+# Senza euristica un percorso non ancora trovato collega due stati aperti diversi con almeno
+# una mossa, quindi si può aggiungere il costo minimo di un passo: top + top + passo >= mu.
+
+class _Side:
+    def __init__(self, root, expand, potential):
+        self.expand = expand  # stato -> [(vicino, costo)]
+        self.potential = potential  # stato -> potenziale, None senza euristica
+        self.frontier = HeapFrontier()
+        self.nodes = {root: Node(root)}  # miglior nodo raggiunto per stato
+        self.closed = {}
+        self.frontier.push(self.nodes[root], self.priority(self.nodes[root]))
+
+    def priority(self, node):
+        if self.potential is None:
+            return node.g
+        return node.g + self.potential(node.state)
+
+
+class BidirectionalSearch(SearchAlgorithm):
+    def __init__(self, heuristic=None, view=False):
+        super().__init__(view)
+        self.heuristic = heuristic  # None: UCS bidirezionale
+        self.explored = []
+
+    def solve(self, problem):
+        """Restituisce (percorso, esplorati) come astar e ucs"""
+        self.reset_expanded()
+        stats = self.stats
+        stats.start()
+        observers = stats.observers
+        self.explored = explored = []
+        start, goal = problem.init, problem.goal
+        if self.heuristic is None:
+            h = potential_f = potential_b = None
+        else:
+            h = make_heuristic(self.heuristic, problem)
+            h_r = make_heuristic(self.heuristic, problem, reverse=True)
+            potential_f = lambda v: (h(v, goal) - h_r(v, start)) / 2
+            potential_b = lambda v: (h_r(v, start) - h(v, goal)) / 2
+        forward = _Side(start, problem.getSuccessors, potential_f)
+        backward = _Side(goal, problem.getPredecessors, potential_b)
+        forward.other, backward.other = backward, forward
+
+        epsilon = min_step_cost(problem) if h is None else 0
+        mu = 0 if start == goal else float('inf')
+        meeting = start if start == goal else None
+        pops, skipped, generated, peak = 0, 0, 0, 2
+
+        while forward.frontier and backward.frontier:
+            if mu <= forward.frontier.top() + backward.frontier.top() + epsilon:
+                break
+            # espande il lato con la frontiera più piccola
+            side = forward if len(forward.frontier) <= len(backward.frontier) else backward
+            node = side.frontier.pop()
+            pops += 1
+            state = node.state
+            if state in side.closed and side.closed[state] <= node.g:
+                skipped += 1
+                continue
+            side.closed[state] = node.g
+            explored.append(state)
+            self.update_expanded(state)
+            if observers:
+                stats.notify("expand", state)
+
+            successors = side.expand(state)
+            generated += len(successors)
+            for successor, step_cost in successors:
+                g = node.g + step_cost
+                if successor in side.closed and g >= side.closed[successor]:
+                    continue
+                best = side.nodes.get(successor)
+                if best is None or g < best.g:
+                    best = side.nodes[successor] = Node(successor, node, successor, g)
+                    side.frontier.push(best, side.priority(best))
+                met = side.other.nodes.get(successor)
+                if met is not None and best.g + met.g < mu:
+                    mu = best.g + met.g
+                    meeting = successor
+            if len(forward.frontier) + len(backward.frontier) > peak:
+                peak = len(forward.frontier) + len(backward.frontier)
+
+        path = []
+        if meeting is not None:
+            path = self.extract_path(forward.nodes[meeting])
+            node = backward.nodes[meeting].parent
+            while node is not None:
+                path.append(node.state)
+                node = node.parent
+        stats.pushes = forward.frontier.pushed + backward.frontier.pushed
+        stats.pops, stats.generated = pops, generated
+        stats.stale = skipped + forward.frontier.stale + backward.frontier.stale
+        stats.expanded = len(explored)
+        stats.peak_frontier, stats.peak_closed = peak, len(forward.closed) + len(backward.closed)
+        stats.stop()
+        return path, explored
+
+def bidirectional_ucs(problem):
+    return BidirectionalSearch().solve(problem)
+
+def bidirectional_astar(problem, heuristic="chebyshev"):
+    return BidirectionalSearch(heuristic).solve(problem)
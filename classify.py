@@ -0,0 +1,81 @@
+import numpy as np
+
+# Classificazione automatica dei terreni dall'immagine della mappa, senza cicli sui pixel.
+# Ogni pixel prende il terreno del colore più vicino della tavolozza (distanza euclidea in RGB),
+# letto da una tabella precalcolata sui colori quantizzati; un pixel più lontano di max_distance
+# da tutti i colori è muro. Ogni cella della griglia
+# prende poi il terreno più frequente tra i suoi pixel (0 = muro, come in PathfindingGUI.grid).
+# La tavolozza di default segue i colori delle mappe in stile OpenStreetMap (Mappa1.png);
+# per altre immagini se ne passa una diversa, con più colori per terreno se serve.
+
+DEFAULT_PALETTE = {
+    "verde": [(173, 209, 158), (205, 235, 176), (200, 215, 171)],  # bosco, prato
+    "nero": [(217, 208, 201), (221, 221, 221), (90, 90, 90)],        # edifici, zone urbane, rilievi
+    "bianco": [(255, 255, 255), (242, 239, 233), (248, 246, 240)],   # strade, terreno aperto
+    "blu": [(170, 211, 223), (120, 170, 220)],                       # acqua
+}
+DEFAULT_MAX_DISTANCE = 60
+QUANT_BITS = 5  # bit per canale della tabella dei colori (32768 colori, errore massimo 4 per canale)
+
+def color_table(palette=None, max_distance=DEFAULT_MAX_DISTANCE):
+    """
+    Etichetta di ogni colore quantizzato a QUANT_BITS bit per canale: array di 2**(3*QUANT_BITS)
+    indici in nomi, dove nomi[0] = 0 è il muro e gli altri sono i terreni della tavolozza.
+    Restituisce (tabella, nomi). La tabella si calcola una volta sola per tavolozza: classificare
+    un'immagine diventa una lettura per pixel, senza distanze da calcolare pixel per pixel.
+    """
+    palette = DEFAULT_PALETTE if palette is None else palette
+    names = [0] + list(palette)
+    colors, labels = [], []
+    for label, name in enumerate(names[1:], 1):
+        for color in palette[name]:
+            colors.append(color)
+            labels.append(label)
+    colors = np.asarray(colors, dtype=np.int32)
+    labels = np.asarray(labels, dtype=np.uint8)
+
+    # centro di ogni cubetto di colore quantizzato
+    step = 1 << (8 - QUANT_BITS)
+    levels = np.arange(1 << QUANT_BITS, dtype=np.int32) * step + step // 2
+    r, g, b = np.meshgrid(levels, levels, levels, indexing="ij")
+    centers = np.stack((r.ravel(), g.ravel(), b.ravel()), axis=1)
+    dist = ((centers[:, None, :] - colors[None, :, :]) ** 2).sum(axis=2)
+    nearest = dist.argmin(axis=1)
+    table = labels[nearest]
+    table[dist[np.arange(len(centers)), nearest] > max_distance ** 2] = 0
+    return table, names
+
+def classify_pixels(pixels, palette=None, max_distance=DEFAULT_MAX_DISTANCE, table=None):
+    """
+    pixels: array (righe, colonne, 3) di colori RGB (uint8).
+    Restituisce (etichette, nomi) come color_table, con etichette array (righe, colonne).
+    """
+    if table is None:
+        table = color_table(palette, max_distance)
+    lut, names = table
+    shift = 8 - QUANT_BITS
+    q = (pixels >> shift).astype(np.uint16)
+    index = (q[..., 0] << (2 * QUANT_BITS)) | (q[..., 1] << QUANT_BITS) | q[..., 2]
+    return lut[index], names
+
+def classify_grid(pixels, rows, cols, cell_height, cell_width, palette=None,
+                  max_distance=DEFAULT_MAX_DISTANCE, table=None):
+    """
+    Righe come PathfindingGUI.grid (0 = muro, nome del terreno) per una griglia rows x cols
+    di celle cell_height x cell_width pixel, dall'angolo in alto a sinistra di pixels.
+    """
+    pixels = pixels[:rows * cell_height, :cols * cell_width]
+    labels, names = classify_pixels(pixels, palette, max_distance, table)
+    # indice della cella di ogni pixel, poi conteggio (cella, etichetta) con bincount
+    cell_row = np.arange(rows * cell_height) // cell_height
+    cell_col = np.arange(cols * cell_width) // cell_width
+    cell = (cell_row[:, None] * cols + cell_col[None, :]).ravel()
+    counts = np.bincount(cell * len(names) + labels.ravel(), minlength=rows * cols * len(names))
+    winner = counts.reshape(rows * cols, len(names)).argmax(axis=1).reshape(rows, cols)
+    lookup = np.array(names, dtype=object)
+    return lookup[winner].tolist()
+
+def surface_pixels(surface):
+    """Pixel RGB di una pygame.Surface come array (righe, colonne, 3), senza copiarli riga per riga"""
+    import pygame
+    return pygame.surfarray.array3d(surface).transpose(1, 0, 2)
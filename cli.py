@@ -0,0 +1,231 @@
+import argparse
+import json
+import sys
+
+from algorithms import (ALGORITHMS, ANYTIME, BUDGETED, MEMORY_BOUNDED, MULTI_GOAL, NEAREST,
+                        NEEDS_GRID, USES_HEURISTIC, nearest, run)
+from heuristics import HEURISTIC_NAMES
+from map_io import load_world
+from pathfinding_problem import PathfindingProblem, as_goal, goal_cells
+from search_stats import SearchStats
+
+# Esecuzione senza interfaccia grafica: niente pygame né tkinter.
+# Carica una mappa salvata dalla GUI (map_io) e risolve una query passata con --start/--goal
+# (una mappa a tasselli si legge un tassello alla volta, con al più --tile-memory MiB in memoria)
+# oppure un flusso di query da file o da stdin ("-"), una per riga:
+#     r1 c1 r2 c2          oppure          {"start": [r1, c1], "goal": [r2, c2]}
+# Con più goal si cerca il più vicino: nelle righe si aggiungono altre coppie r c, in JSON
+# "goal" è una lista di celle [[r2, c2], [r3, c3], ...].
+# Ogni risultato è una riga JSON scritta appena la query è risolta.
+# Con l'euristica alt le tabelle dei landmark si salvano accanto alla mappa (mappa.map.alt,
+# come fa la GUI con l'immagine) e le esecuzioni successive le rileggono da lì.
+#
+#     python cli.py mappa.map --start 0,0 --goal 40,60 --algorithm UCS
+#     python cli.py mappa.map --queries query.txt --output risultati.jsonl --cache 256
+#     python cli.py mappa.map --start 0,0 --goal 40,60 --algorithm ARA* --time-limit 0.05
+#     python cli.py mappa.map --start 0,0 --goal 40,60 --algorithm SMA* --node-budget 5000 --memory
+#     python cli.py mappa.map --start 0,0 --goal 40,60 --algorithm IDA* --time-limit 2
+# Una ricerca fermata dal budget ha "out_of_budget": true nelle stats (IDA* e SMA* senza
+# percorso, ARA* con il migliore trovato).
+#     python cli.py mappa.map --start 0,0 --goal 40,60 --goal 10,90 --goal 75,5 --nearest 2
+
+def parse_point(text):
+    row, col = text.split(",")
+    return int(row), int(col)
+
+def parse_query(line):
+    """
+    (start, goal) da una riga di query, None per le righe vuote e i commenti.
+    goal è una cella o, con più goal, la tupla delle celle (pathfinding_problem.as_goal)
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    if line.startswith("{"):
+        query = json.loads(line)
+        start, goal = query["start"], query["goal"]
+    else:
+        values = [int(v) for v in line.replace(",", " ").split()]
+        if len(values) < 4 or len(values) % 2:
+            raise ValueError("servono start e almeno un goal, coppie riga colonna")
+        start, goal = values[:2], [values[i:i + 2] for i in range(2, len(values), 2)]
+    cells = (start, *goal_cells(goal))
+    if not all(len(cell) == 2 and all(isinstance(v, int) for v in cell) for cell in cells):
+        raise ValueError("ogni cella è una coppia di interi")
+    return tuple(start), as_goal(goal)
+
+def read_queries(stream):
+    for number, line in enumerate(stream, 1):
+        try:
+            query = parse_query(line)
+        except (ValueError, KeyError) as e:
+            raise ValueError(f"Query non valida alla riga {number}: {line.strip()!r}") from e
+        if query is not None:
+            yield query
+
+def check_bounds(queries, grid, algorithm):
+    for start, goal in queries:
+        cells = goal_cells(goal)
+        for point in (start, *cells):
+            if not grid.in_bounds(*point):
+                raise SystemExit(f"{point} è fuori dalla mappa {grid.x_lim}x{grid.y_lim}")
+        if len(set(cells)) > 1 and algorithm not in MULTI_GOAL:
+            raise SystemExit(f"{algorithm} non accetta più goal: {list(cells)}")
+        yield start, goal
+
+def improvement_observer(improvements):
+    """Osservatore di SearchStats che raccoglie i (percorso, costo, bound) degli algoritmi anytime"""
+    def observe(event, stats, state):
+        if event == "improve":
+            improvements.append(state)
+    return observe
+
+def result_row(problem, path, stats, with_path=True, bound=None):
+    row = {
+        "start": problem.init,
+        "goal": problem.goal if problem.goal is not None else (path[-1] if path else None),
+        "found": bool(path),
+        "cost": sum(problem.stepCost(state) for state in path[1:]) if path else None,
+        "length": len(path),
+        "stats": stats.as_dict(),
+    }
+    if bound is not None:
+        row["bound"] = bound  # algoritmi anytime: il costo è al più bound volte l'ottimo
+    if with_path:
+        row["path"] = path
+    return row
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pathfinding senza GUI su una mappa salvata")
+    parser.add_argument("map", help="mappa salvata dalla GUI (.map)")
+    parser.add_argument("--start", type=parse_point, help="riga,colonna di partenza")
+    parser.add_argument("--goal", type=parse_point, action="append",
+                        help="riga,colonna di arrivo (ripetibile: si cerca il goal più vicino)")
+    parser.add_argument("--nearest", type=int, metavar="K",
+                        help="restituisce i K goal più vicini da una sola ricerca (A*, BFS, UCS)")
+    parser.add_argument("--queries", help="file di query, una per riga ('-' per stdin)")
+    parser.add_argument("--algorithm", default="A*", choices=list(ALGORITHMS))
+    parser.add_argument("--heuristic", default="chebyshev", choices=HEURISTIC_NAMES)
+    parser.add_argument("--weight", type=float, default=1.0)
+    parser.add_argument("--cost", action="append", default=[], metavar="TERRENO=COSTO",
+                        help="sostituisce il costo salvato di un terreno (ripetibile)")
+    parser.add_argument("--cache", type=int, default=0, metavar="N",
+                        help="cache LRU di N query ripetute (0 = nessuna)")
+    parser.add_argument("--workers", type=int, default=0, metavar="N",
+                        help="risolve le query con N processi (batch.solve_batch)")
+    parser.add_argument("--time-limit", type=float, metavar="SECONDI",
+                        help="budget di tempo per query (ARA*, IDA*, SMA*)")
+    parser.add_argument("--max-expansions", type=int, metavar="N",
+                        help="budget di espansioni per query (ARA*, IDA*, SMA*)")
+    parser.add_argument("--node-budget", type=int, metavar="N",
+                        help="nodi al più in memoria (solo algoritmi a memoria limitata, SMA*)")
+    parser.add_argument("--memory", action="store_true",
+                        help="misura il picco di memoria di ogni ricerca (tracemalloc, più lento)")
+    parser.add_argument("--tile-memory", type=float, default=64, metavar="MIB",
+                        help="tetto di memoria dei tasselli per le mappe a tasselli (default 64)")
+    parser.add_argument("--no-path", action="store_true", help="non scrive le celle del percorso")
+    parser.add_argument("--output", help="file di uscita (default stdout)")
+    args = parser.parse_args(argv)
+
+    if args.queries is None and (args.start is None or args.goal is None):
+        parser.error("servono --start e --goal oppure --queries")
+    if args.queries is not None and (args.start is not None or args.goal is not None):
+        parser.error("--start e --goal non valgono con --queries: i goal vanno nelle righe di query")
+    budget = {"time_limit": args.time_limit, "max_expansions": args.max_expansions}
+    if (args.time_limit is not None or args.max_expansions is not None) and args.algorithm not in BUDGETED:
+        parser.error(f"--time-limit e --max-expansions valgono solo per {', '.join(sorted(BUDGETED))}")
+    if args.node_budget is not None:
+        if args.algorithm not in MEMORY_BOUNDED:
+            parser.error(f"--node-budget vale solo per {', '.join(sorted(MEMORY_BOUNDED))}")
+        budget["node_budget"] = args.node_budget
+    if args.goal is not None and len(args.goal) > 1:
+        if args.algorithm not in MULTI_GOAL:
+            parser.error(f"più --goal valgono solo per {', '.join(sorted(MULTI_GOAL))}")
+    if args.nearest is not None:
+        if args.algorithm not in NEAREST:
+            parser.error(f"--nearest vale solo per {', '.join(sorted(NEAREST))}")
+        if args.workers or budget != {"time_limit": None, "max_expansions": None}:
+            parser.error("--nearest non vale con --workers né con un budget")
+
+    world, costs = load_world(args.map, max_bytes=int(args.tile_memory * (1 << 20)))
+    tiles = getattr(world, "tiles", None)
+    if tiles is not None:
+        if args.workers:
+            parser.error("--workers richiede una mappa senza tasselli")
+        if args.algorithm in NEEDS_GRID:
+            parser.error(f"{args.algorithm} richiede una mappa senza tasselli")
+        if args.heuristic == "alt" and args.algorithm in USES_HEURISTIC:
+            parser.error("l'euristica alt richiede una mappa senza tasselli")
+    for item in args.cost:
+        name, _, value = item.partition("=")
+        costs[name] = float(value) if "." in value else int(value)
+
+    if args.queries is None:
+        queries = iter([(args.start, as_goal(args.goal))])
+    elif args.queries == "-":
+        queries = read_queries(sys.stdin)
+    else:
+        with open(args.queries) as f:
+            queries = list(read_queries(f))
+    queries = check_bounds(queries, world.grid if tiles is None else tiles, args.algorithm)
+    alt_path = None
+    if args.heuristic == "alt" and args.algorithm in USES_HEURISTIC:
+        alt_path = args.map + ".alt"
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        if args.workers:
+            from batch import solve_batch
+            for result in solve_batch(world, costs, list(queries), args.algorithm, args.heuristic,
+                                      args.weight, workers=args.workers, trace_memory=args.memory,
+                                      landmarks_path=alt_path, **budget):
+                if args.no_path:
+                    del result["path"]
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+            return 0
+        cache = None
+        if args.cache:
+            from path_cache import PathCache
+            cache = PathCache(args.cache)
+        for start, goal in queries:
+            problem = PathfindingProblem(world, start, goal, costs)
+            if alt_path is not None:
+                # tabelle dal file accanto alla mappa (o calcolate e salvate lì): le ricerche
+                # le ritrovano poi in memoria
+                from landmarks import get_landmarks
+                get_landmarks(problem, alt_path)
+                alt_path = None
+            stats = SearchStats(trace_memory=args.memory)
+            if args.nearest is not None:
+                paths, _ = nearest(problem, args.algorithm, args.nearest, args.heuristic, args.weight, stats)
+                row = result_row(problem, paths[0] if paths else [], stats, not args.no_path)
+                row["nearest"] = [result_row(problem, path, stats, not args.no_path) for path in paths]
+                for goal_row in row["nearest"]:
+                    del goal_row["start"], goal_row["stats"]
+                if tiles is not None:
+                    row["tiles"] = tiles.counters()
+                out.write(json.dumps(row) + "\n")
+                out.flush()
+                continue
+            improvements = []
+            if args.algorithm in ANYTIME:
+                stats.subscribe(improvement_observer(improvements))
+            path, _ = run(problem, args.algorithm, args.heuristic, args.weight, cache=cache, stats=stats, **budget)
+            bound = None
+            if improvements:
+                bound = improvements[-1][2]
+            elif path and args.algorithm in ANYTIME:
+                bound = 1.0  # dalla cache: senza budget la ricerca arriva all'ottimo
+            row = result_row(problem, path, stats, not args.no_path, bound)
+            if tiles is not None:
+                row["tiles"] = tiles.counters()  # contatori cumulativi dall'apertura della mappa
+            out.write(json.dumps(row) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+from collections import deque
+
+import numpy as np
+
+from pathfinding_problem import DIRECTIONS
+
+WALL_LABEL = -1
+REBUILD_EDITS = 256  # oltre queste modifiche insieme conviene rietichettare tutta la griglia
+LOCAL_SPLIT = 20_000  # celle visitate in Python prima di rietichettare la componente con NumPy
+
+# Componenti connesse delle celle libere di una GridWorld, con le mosse della ricerca (8
+# direzioni, anche in diagonale tra due muri): il goal si raggiunge dallo start se e solo se
+# hanno la stessa etichetta, e le ricerche lo controllano prima di partire invece di esplorare
+# tutta la regione dello start. L'etichetta di una componente è l'indice piatto della sua
+# prima cella. Si calcolano con un union-find vettoriale: a ogni giro la radice di ogni cella
+# si aggancia alla radice più piccola tra quelle dei vicini, poi i puntatori saltano al nonno
+# finché non puntano tutti a una radice; bastano pochi giri anche su griglie grandi.
+# Le modifiche di una cella si applicano senza ricalcolare tutto: una cella che diventa libera
+# unisce le componenti dei vicini; una che diventa muro divide la sua componente solo se i
+# vicini liberi non restano collegati tra loro attorno a essa, e allora delle visite locali
+# da ogni gruppo di vicini trovano le parti separate (ComponentIndex._split).
+
+def _edges(free):
+    """Coppie (u, v) di indici piatti di celle libere adiacenti, ogni coppia una volta"""
+    index = np.arange(free.size).reshape(free.shape)
+    u, v = [], []
+    for a, b in ((np.s_[:, :-1], np.s_[:, 1:]), (np.s_[:-1, :], np.s_[1:, :]),
+                 (np.s_[:-1, :-1], np.s_[1:, 1:]), (np.s_[:-1, 1:], np.s_[1:, :-1])):
+        both = free[a] & free[b]
+        u.append(index[a][both])
+        v.append(index[b][both])
+    return np.concatenate(u), np.concatenate(v)
+
+def _label(free):
+    """Etichette di free (array booleano 2D), appiattite: indice della prima cella della componente"""
+    parent = np.arange(free.size)
+    u, v = _edges(free)
+    while u.size:
+        pu, pv = parent[u], parent[v]
+        differ = pu != pv
+        u, v, pu, pv = u[differ], v[differ], pu[differ], pv[differ]
+        if not u.size:
+            break
+        np.minimum.at(parent, np.maximum(pu, pv), np.minimum(pu, pv))
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+    return np.where(free.ravel(), parent, WALL_LABEL).astype(np.int32)
+
+class ComponentIndex:
+    """Etichette delle componenti connesse delle celle libere di una GridWorld"""
+    def __init__(self, grid):
+        self.x_lim, self.y_lim = grid.x_lim, grid.y_lim
+        self.rebuild(grid)
+
+    def rebuild(self, grid):
+        free = np.frombuffer(grid.cells, dtype=np.uint8).reshape(grid.x_lim, grid.y_lim) != 0
+        self.labels = _label(free)
+
+    def copy(self):
+        index = ComponentIndex.__new__(ComponentIndex)
+        index.x_lim, index.y_lim = self.x_lim, self.y_lim
+        index.labels = self.labels.copy()
+        return index
+
+    def label(self, x, y):
+        return int(self.labels[x * self.y_lim + y])
+
+    def connected(self, a, b):
+        """
+        True se dalla cella a si raggiunge la cella b, con le regole della ricerca: b deve
+        essere libera (salvo b == a), a può essere un muro e allora se ne esce dai vicini liberi
+        """
+        if a == b:
+            return True
+        labels, y_lim = self.labels, self.y_lim
+        lb = labels[b[0] * y_lim + b[1]]
+        if lb == WALL_LABEL:
+            return False
+        x, y = a
+        la = labels[x * y_lim + y]
+        if la != WALL_LABEL:
+            return la == lb
+        return any(0 <= x + dx < self.x_lim and 0 <= y + dy < y_lim
+                   and labels[(x + dx) * y_lim + y + dy] == lb for dx, dy in DIRECTIONS)
+
+    def count(self):
+        """Numero di componenti: le celle che fanno da etichetta alla propria"""
+        return int(np.count_nonzero(self.labels == np.arange(self.labels.size)))
+
+    def update(self, grid, cells):
+        """Applica le celle (x, y) di grid che possono essere cambiate da libere a muro o viceversa"""
+        if len(cells) > REBUILD_EDITS:
+            self.rebuild(grid)
+            return
+        y_lim, codes = self.y_lim, grid.cells
+        for x, y in cells:
+            self.update_cell(x, y, codes[x * y_lim + y] != 0)
+
+    def update_cell(self, x, y, free):
+        labels, y_lim = self.labels, self.y_lim
+        i = x * y_lim + y
+        old = labels[i]
+        if (old != WALL_LABEL) == free:
+            return
+        around = [(x + dx, y + dy) for dx, dy in DIRECTIONS
+                  if 0 <= x + dx < self.x_lim and 0 <= y + dy < y_lim
+                  and labels[(x + dx) * y_lim + y + dy] != WALL_LABEL]
+        if free:
+            # la nuova cella unisce le componenti dei vicini: l'etichetta è la prima cella
+            joined = {int(labels[nx * y_lim + ny]) for nx, ny in around}
+            label = min(joined | {i})
+            if joined - {label}:
+                labels[np.isin(labels, list(joined - {label}))] = label
+            labels[i] = label
+            return
+        labels[i] = WALL_LABEL
+        if not around:
+            return
+        groups = self._ring_groups(around)
+        if len(groups) > 1:
+            # la componente può essersi divisa: si vede con una visita locale da ogni gruppo
+            self._split(old, [[nx * y_lim + ny for nx, ny in group] for group in groups])
+        elif old == i:  # la prima cella non c'è più: l'etichetta passa alla successiva
+            members = labels == old
+            labels[members] = np.argmax(members)
+
+    def _split(self, old, groups):
+        """
+        Visite in ampiezza intercalate dai gruppi di vicini della cella tolta, sempre dalla più
+        piccola: due visite che si incontrano si uniscono; una che si esaurisce è una componente
+        separata e prende una nuova etichetta. Il costo è quello delle parti più piccole; oltre
+        LOCAL_SPLIT celle visitate si rietichetta tutta la componente con _label.
+        """
+        labels, y_lim, x_lim = self.labels, self.y_lim, self.x_lim
+        owner = {}  # cella -> visita che l'ha raggiunta
+        visits = []
+        for number, group in enumerate(groups):
+            for cell in group:
+                owner[cell] = number
+            visits.append([set(group), deque(group)])
+        merged = list(range(len(groups)))  # union-find delle visite
+
+        def find(v):
+            while merged[v] != v:
+                v = merged[v]
+            return v
+
+        alive = set(range(len(groups)))
+        visited = 0
+        while len(alive) > 1:
+            v = min(alive, key=lambda n: len(visits[n][0]))
+            cells, queue = visits[v]
+            if not queue:
+                # parte separata: etichetta la sua prima cella
+                part = np.fromiter(cells, dtype=np.int64)
+                first = int(part.min())
+                labels[part] = first
+                alive.discard(v)
+                if first == old:  # il resto della componente prende una nuova etichetta
+                    rest = labels == old
+                    rest[part] = False
+                    old = int(np.argmax(rest))
+                    labels[rest] = old
+                continue
+            visited += 1
+            if visited > LOCAL_SPLIT:
+                members = labels == old
+                relabelled = _label(members.reshape(x_lim, y_lim))
+                labels[members] = relabelled[members]
+                return
+            c = queue.popleft()
+            x, y = divmod(c, y_lim)
+            for dx, dy in DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < x_lim and 0 <= ny < y_lim:
+                    n = nx * y_lim + ny
+                    if labels[n] != old:
+                        continue
+                    other = owner.get(n)
+                    if other is None:
+                        owner[n] = v
+                        cells.add(n)
+                        queue.append(n)
+                        continue
+                    other = find(other)
+                    if other != v:
+                        # le due visite si incontrano: sono la stessa componente
+                        merged[other] = v
+                        cells |= visits[other][0]
+                        queue.extend(visits[other][1])
+                        visits[other] = None
+                        alive.discard(other)
+        if labels[old] != old:  # l'etichetta era la cella tolta: passa alla prima rimasta
+            rest = labels == old
+            if rest.any():
+                labels[rest] = np.argmax(rest)
+
+    @staticmethod
+    def _ring_groups(cells):
+        """Gruppi delle celle attorno a una cella, collegate tra loro senza passare da essa"""
+        groups = []
+        todo = list(cells)
+        while todo:
+            group = [todo.pop()]
+            reached = list(group)
+            while reached:
+                x, y = reached.pop()
+                near = [c for c in todo if max(abs(c[0] - x), abs(c[1] - y)) == 1]
+                todo = [c for c in todo if c not in near]
+                group.extend(near)
+                reached.extend(near)
+            groups.append(group)
+        return groups
+
+def _goals(problem):
+    goals = getattr(problem, "goals", None)
+    return (problem.goal,) if goals is None else goals
+
+def reachable_goals(problem):
+    """I goal di problem nella stessa componente dello start (tutti se non c'è una griglia)"""
+    grid = getattr(problem, "grid", None)
+    if grid is None:
+        return list(_goals(problem))
+    components = grid.components
+    return [goal for goal in _goals(problem) if components.connected(problem.init, goal)]
+
+def unreachable(problem):
+    """True se la griglia di problem dice che nessun goal si raggiunge dallo start"""
+    grid = getattr(problem, "grid", None)
+    if grid is None:
+        return False
+    components = grid.components
+    return not any(components.connected(problem.init, goal) for goal in _goals(problem))
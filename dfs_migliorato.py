@@ -1,21 +1,15 @@
-def dfs(problem):
-    frontiera = [(problem.init, [problem.init])]  # pila: lista usata come stack
-    visto = set()
-    explored = []
-
-    while frontiera:  # controlla se la lista non è vuota
-        current, path = frontiera.pop()  # prende l'ultimo elemento
+from frontier import StackFrontier
+from search_algorithm import GraphSearch
 
-        if current in visto:
-            continue
-        visto.add(current)
-        explored.append(current)
+class DFS(GraphSearch):
+    reopen = False
 
-        if problem.isGoal(current):
-            return path, explored
+    def new_frontier(self):
+        return StackFrontier()  # pila: lista usata come stack
 
-        for successor, _ in reversed(problem.getSuccessors(current)):  
-            if successor not in visto:
-                frontiera.append((successor, path + [successor]))
+    def successors(self, problem, node):
+        # al contrario, così il primo successore è il primo a essere estratto
+        return problem.getSuccessors(node.state)[::-1]
 
-    return [], explored
+def dfs(problem):
+    return DFS().solve(problem)
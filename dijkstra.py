@@ -0,0 +1,134 @@
+from array import array
+from heapq import heappush, heappop
+
+from pathfinding_problem import DIRECTIONS
+from search_stats import SearchStats
+
+INF = float('inf')
+NO_DIRECTION = 255  # nel campo delle direzioni: sorgente o cella irraggiungibile
+
+def distances(problem, sources, reverse=False, directions=None, stats=None):
+    """
+    Dijkstra uno-a-tutti sulla GridWorld di problem, per indici piatti.
+    Restituisce un array('d') con la distanza minima da una delle sorgenti a ogni cella
+    (inf se irraggiungibile). Con reverse=True calcola invece la distanza da ogni cella
+    verso le sorgenti: si entra in una cella pagando il suo terreno, quindi all'indietro
+    espandere i costa cost(i) verso ogni vicino.
+    Se directions è un bytearray lungo quanto la griglia, per ogni cella raggiunta j vi scrive
+    l'indice in DIRECTIONS della mossa da j verso la cella da cui è stata raggiunta.
+    Con stats (SearchStats) si riempiono i contatori della ricerca.
+    """
+    grid = problem.grid
+    cells, cost_by_code = grid.cells, problem.cost_by_code
+    x_lim, y_lim, offsets = grid.x_lim, grid.y_lim, grid.offsets
+    dist = array('d', [INF]) * len(cells)
+    heap = []
+    for i in sources:
+        dist[i] = 0
+        heap.append((0, i))
+    heap.sort()
+    pushes, pops, stale, generated, peak = len(heap), 0, 0, 0, len(heap)
+    observers = stats.observers if stats is not None else None
+
+    while heap:
+        d, i = heappop(heap)
+        pops += 1
+        if d > dist[i]:
+            stale += 1
+            continue  # voce superata
+        x, y = divmod(i, y_lim)
+        if observers:
+            stats.notify("expand", (x, y))
+        if reverse:
+            back = d + cost_by_code[cells[i]]
+        for k, (dx, dy, off) in enumerate(offsets):
+            if 0 <= x + dx < x_lim and 0 <= y + dy < y_lim:
+                j = i + off
+                code = cells[j]
+                if code:
+                    generated += 1
+                    nd = back if reverse else d + cost_by_code[code]
+                    if nd < dist[j]:
+                        dist[j] = nd
+                        heappush(heap, (nd, j))
+                        pushes += 1
+                        if directions is not None:
+                            directions[j] = (k + 4) % 8  # DIRECTIONS opposte distano 4
+        if len(heap) > peak:
+            peak = len(heap)
+    if stats is not None:
+        stats.pushes, stats.pops, stats.stale, stats.generated = pushes, pops, stale, generated
+        stats.expanded = stats.peak_closed = pops - stale
+        stats.peak_frontier = peak
+    return dist
+
+
+class FlowField:
+    """
+    Campo delle distanze e campo di flusso verso un goal comune, da un solo Dijkstra all'indietro.
+    dist[i] è il costo minimo da i al goal, direction[i] l'indice in DIRECTIONS del primo passo:
+    da qualsiasi start il percorso si legge in O(lunghezza del percorso).
+    Senza goal si usano tutti i goal di problem: il campo porta al più vicino.
+    """
+    def __init__(self, problem, goal=None, stats=None):
+        self.grid = grid = problem.grid
+        self.cost_by_code = problem.cost_by_code
+        self.goal = problem.goal if goal is None else goal
+        goals = problem.goals if goal is None else (goal,)
+        self.direction = bytearray([NO_DIRECTION]) * len(grid.cells)
+        self.stats = SearchStats() if stats is None else stats
+        self.stats.start()
+        self.dist = distances(problem, [grid.index(*cell) for cell in goals], reverse=True,
+                              directions=self.direction, stats=self.stats)
+        self.stats.stop()
+
+    def cost(self, state):
+        return self.dist[self.grid.index(*state)]
+
+    def next_step(self, state):
+        """Cella successiva verso il goal, None su un goal o se il goal non è raggiungibile"""
+        k = self.direction[self.grid.index(*state)]
+        if k == NO_DIRECTION:
+            return None
+        dx, dy = DIRECTIONS[k]
+        return state[0] + dx, state[1] + dy
+
+    def path(self, start):
+        """Percorso ottimo da start al goal, [] se il goal non è raggiungibile"""
+        grid, direction = self.grid, self.direction
+        i = grid.index(*start)
+        path = [start]
+        if self.dist[i] == INF:
+            # da uno start su un muro si esce verso un vicino libero, come nella ricerca
+            i = self._exit(start)
+            if i is None:
+                return []
+            path.append(grid.coords(i))
+        while True:
+            k = direction[i]
+            if k == NO_DIRECTION:
+                return path
+            i += grid.offsets[k][2]
+            path.append(grid.coords(i))
+
+    def _exit(self, state):
+        """Vicino libero di state da cui il goal costa meno entrandoci, None se non ce n'è"""
+        grid, dist, cost_by_code = self.grid, self.dist, self.cost_by_code
+        x, y = state
+        i = grid.index(x, y)
+        best, best_cost = None, INF
+        for dx, dy, off in grid.offsets:
+            if 0 <= x + dx < grid.x_lim and 0 <= y + dy < grid.y_lim:
+                j = i + off
+                code = grid.cells[j]
+                if code and dist[j] + cost_by_code[code] < best_cost:
+                    best, best_cost = j, dist[j] + cost_by_code[code]
+        return best
+
+    def reached(self):
+        """Celle da cui il goal è raggiungibile"""
+        coords = self.grid.coords
+        return [coords(i) for i, d in enumerate(self.dist) if d != INF]
+
+def flow_field(problem, goal=None):
+    return FlowField(problem, goal)
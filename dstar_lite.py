@@ -0,0 +1,212 @@
+from array import array
+from heapq import heappush, heappop
+
+from heuristics import min_step_cost
+from search_stats import SearchStats
+
+INF = float('inf')
+
+# D* Lite: ricerca all'indietro dal goal che conserva g e rhs tra una pianificazione e l'altra.
+# g(s) è il costo da s al goal, rhs(s) = min sui vicini s' di costo(s') + g(s') (si entra in s'
+# pagando il suo terreno). Quando cambiano delle celle si aggiornano solo i vertici i cui archi
+# sono cambiati e compute_shortest_path ripara la parte della soluzione che ne dipende.
+# Start e goal sono fissi per un'istanza: se cambiano si crea un nuovo DStarLite.
+
+class DStarLite:
+    def __init__(self, problem):
+        self.grid = problem.grid
+        self.cost_by_code = list(problem.cost_by_code)
+        self.start = self.grid.index(*problem.init)
+        self.goal = self.grid.index(*problem.goal)
+        self.init = problem.init
+        self.min_cost = min_step_cost(problem)
+        size = len(self.grid.cells)
+        self.g = array('d', [INF]) * size
+        self.rhs = array('d', [INF]) * size
+        self.rhs[self.goal] = 0
+        self.queue = []
+        self.queued = {}  # stato -> chiave valida nella heap
+        self.stats = SearchStats()  # contatori dell'ultima plan
+        self.pushes = self.stale = 0  # dall'ultima plan, comprese le riparazioni in update_*
+        self._push(self.goal)
+
+    def _h(self, i):
+        # stima ammissibile del costo da start a i: distanza di Chebyshev per il passo minimo
+        sx, sy = divmod(self.start, self.grid.y_lim)
+        x, y = divmod(i, self.grid.y_lim)
+        return self.min_cost * max(abs(sx - x), abs(sy - y))
+
+    def _key(self, i):
+        g, rhs = self.g[i], self.rhs[i]
+        m = g if g < rhs else rhs
+        return (m + self._h(i), m)
+
+    def _push(self, i):
+        key = self._key(i)
+        self.pushes += 1
+        self.queued[i] = key
+        heappush(self.queue, (key, i))
+
+    def _neighbours(self, i):
+        grid = self.grid
+        x, y = divmod(i, grid.y_lim)
+        return [i + off for dx, dy, off in grid.offsets
+                if 0 <= x + dx < grid.x_lim and 0 <= y + dy < grid.y_lim]
+
+    def _best_rhs(self, i):
+        # min sui vicini liberi j di costo(j) + g(j)
+        grid, cost_by_code, g = self.grid, self.cost_by_code, self.g
+        cells, x_lim, y_lim = grid.cells, grid.x_lim, grid.y_lim
+        x, y = divmod(i, y_lim)
+        best = INF
+        for dx, dy, off in grid.offsets:
+            if 0 <= x + dx < x_lim and 0 <= y + dy < y_lim:
+                code = cells[i + off]
+                if code:
+                    value = cost_by_code[code] + g[i + off]
+                    if value < best:
+                        best = value
+        return best
+
+    def _requeue(self, i):
+        self.queued.pop(i, None)  # la voce nella heap diventa superata
+        if self.g[i] != self.rhs[i]:
+            self._push(i)
+
+    def _update_vertex(self, i):
+        if i != self.goal:
+            self.rhs[i] = self._best_rhs(i)
+        self._requeue(i)
+
+    def _top_key(self):
+        queue, queued = self.queue, self.queued
+        while queue and queued.get(queue[0][1]) != queue[0][0]:
+            heappop(queue)
+            self.stale += 1
+        return queue[0][0] if queue else (INF, INF)
+
+    def compute_shortest_path(self):
+        """Ripara g finché lo start è consistente; restituisce gli stati espansi"""
+        expanded = []
+        g, rhs, start, goal, cells = self.g, self.rhs, self.start, self.goal, self.grid.cells
+        observers = self.stats.observers
+        pops = generated = 0
+        peak = len(self.queued)
+        while self._top_key() < self._key(start) or rhs[start] != g[start]:
+            key, u = heappop(self.queue)
+            pops += 1
+            del self.queued[u]
+            new_key = self._key(u)
+            if key < new_key:
+                self._push(u)
+                continue
+            expanded.append(u)
+            if observers:
+                self.stats.notify("expand", self.grid.coords(u))
+            # versione ottimizzata: si ricalcola rhs di un vicino solo se dipendeva da u
+            preds = self._neighbours(u) if cells[u] else []
+            generated += len(preds)
+            step = self.cost_by_code[cells[u]]
+            if g[u] > rhs[u]:
+                g[u] = rhs[u]
+                value = step + g[u]
+                for p in preds:
+                    if p != goal and value < rhs[p]:
+                        rhs[p] = value
+                        self._requeue(p)
+            else:
+                g_old = g[u]
+                g[u] = INF
+                for p in preds:
+                    if p != goal and rhs[p] == step + g_old:
+                        rhs[p] = self._best_rhs(p)
+                        self._requeue(p)
+                self._requeue(u)
+            if len(self.queued) > peak:
+                peak = len(self.queued)
+        self.pops, self.generated, self.peak = pops, generated, peak
+        return expanded
+
+    def path(self):
+        """Percorso greedy sui valori g dallo start al goal, [] se il goal non è raggiungibile"""
+        g, cells, cost_by_code, coords = self.g, self.grid.cells, self.cost_by_code, self.grid.coords
+        if g[self.start] == INF:
+            return []
+        i = self.start
+        path = [self.init]
+        while i != self.goal:
+            best, best_value = None, INF
+            for j in self._neighbours(i):
+                code = cells[j]
+                if code:
+                    value = cost_by_code[code] + g[j]
+                    if value < best_value:
+                        best, best_value = j, value
+            if best is None:
+                return []
+            i = best
+            path.append(coords(i))
+        return path
+
+    def plan(self):
+        """Restituisce (percorso, esplorati) come gli altri algoritmi"""
+        stats = self.stats
+        stats.start()
+        expanded = self.compute_shortest_path()
+        coords = self.grid.coords
+        result = self.path(), [coords(i) for i in expanded]
+        stats.pushes, stats.pops, stats.stale, stats.generated = self.pushes, self.pops, self.stale, self.generated
+        stats.expanded, stats.peak_frontier, stats.peak_closed = len(expanded), self.peak, len(set(expanded))
+        self.pushes = self.stale = 0
+        stats.stop()
+        return result
+
+    def update_cells(self, grid, changed):
+        """
+        Le celle changed [(x, y)] sono cambiate in grid: aggiorna i vertici con archi modificati.
+        Restituisce False se serve ripartire da zero: grid ha terreni che la tabella dei costi
+        non conosce, o una cella ora costa meno del passo minimo usato dall'euristica.
+        """
+        if len(grid.terrain_names) != len(self.cost_by_code):
+            return False
+        for x, y in changed:
+            code = grid.cells[grid.index(x, y)]
+            if code and self.cost_by_code[code] < self.min_cost:
+                return False
+        self.grid = grid
+        touched = set()
+        for x, y in changed:
+            i = grid.index(x, y)
+            touched.add(i)
+            touched.update(self._neighbours(i))
+        for i in touched:
+            self._update_vertex(i)
+        return True
+
+    def update_costs(self, cost_by_code):
+        """
+        Nuova tabella dei costi: aggiorna i vicini delle celle dei terreni cambiati.
+        Restituisce False se serve ripartire da zero, cioè se un costo scende sotto il
+        passo minimo usato dall'euristica (che non sarebbe più ammissibile).
+        """
+        cost_by_code = list(cost_by_code)
+        if len(cost_by_code) != len(self.cost_by_code):
+            return False
+        grid = self.grid
+        changed_codes = [code for code, (old, new) in enumerate(zip(self.cost_by_code, cost_by_code))
+                         if code and old != new and grid.find(code) != -1]
+        if any(cost_by_code[code] < self.min_cost for code in changed_codes):
+            return False
+        self.cost_by_code = cost_by_code
+        touched = set()
+        for code in changed_codes:
+            i = grid.find(code)
+            while i != -1:
+                touched.update(self._neighbours(i))
+                i = grid.find(code, i + 1)
+        for i in touched:
+            self._update_vertex(i)
+        return True
+
+def dstar_lite(problem):
+    return DStarLite(problem).plan()
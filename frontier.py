@@ -0,0 +1,98 @@
+from collections import deque
+from heapq import heappush, heappop
+from itertools import count
+from queue import PriorityQueue
+
+# Frontiere usate dal motore di ricerca comune (search_algorithm.GraphSearch).
+# Tutte contengono Node e offrono push(node, priority), pop() e len().
+
+class QueueFrontier:
+    """Coda FIFO (BFS)"""
+    def __init__(self):
+        self.items = deque()
+
+    def push(self, node, priority=0):
+        self.items.append(node)
+
+    def pop(self):
+        return self.items.popleft()
+
+    def __len__(self):
+        return len(self.items)
+
+
+class StackFrontier:
+    """Pila LIFO (DFS)"""
+    def __init__(self):
+        self.items = []
+
+    def push(self, node, priority=0):
+        self.items.append(node)
+
+    def pop(self):
+        return self.items.pop()
+
+    def __len__(self):
+        return len(self.items)
+
+
+class PriorityFrontier:
+    """Coda con priorità (UCS, A*): a parità di priorità vince il g minore, poi l'ordine di inserimento"""
+    def __init__(self):
+        self.queue = PriorityQueue()
+        self.counter = count()  # evita di confrontare i Node
+
+    def push(self, node, priority=0):
+        self.queue.put((priority, node.g, next(self.counter), node))
+
+    def pop(self):
+        return self.queue.get()[3]
+
+    def __len__(self):
+        return self.queue.qsize()
+
+
+class HeapFrontier:
+    """
+    Coda con priorità su heapq, senza lock: stesso ordine di PriorityFrontier.
+    Tiene il g migliore di ogni stato: i push peggiori vengono scartati subito
+    e le voci superate da un push migliore (stale) vengono saltate in pop.
+    """
+    def __init__(self):
+        self.heap = []
+        self.counter = count()
+        self.best_g = {}     # stato -> g migliore mai inserito
+        self.queued = set()  # stati con una voce valida nella heap
+        self.stale = 0       # voci superate saltate
+        self.pushed = 0      # voci inserite davvero (i push peggiori non contano)
+
+    def push(self, node, priority=0):
+        state = node.state
+        best = self.best_g.get(state)
+        if best is not None and best <= node.g:
+            return
+        self.best_g[state] = node.g
+        self.queued.add(state)
+        self.pushed += 1
+        heappush(self.heap, (priority, node.g, next(self.counter), node))
+
+    def pop(self):
+        heap, best_g = self.heap, self.best_g
+        while True:
+            _, g, _, node = heappop(heap)
+            if g > best_g[node.state]:
+                self.stale += 1
+                continue
+            self.queued.discard(node.state)
+            return node
+
+    def top(self):
+        """Priorità minima tra le voci valide (inf se vuota), senza estrarla"""
+        heap, best_g = self.heap, self.best_g
+        while heap and heap[0][1] > best_g[heap[0][3].state]:
+            heappop(heap)
+            self.stale += 1
+        return heap[0][0] if heap else float('inf')
+
+    def __len__(self):
+        return len(self.queued)
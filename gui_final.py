@@ -1,16 +1,26 @@
+import numpy as np
 import pygame
 import tkinter as tk
 from tkinter import filedialog
+import json
+import os
 import time
 from typing import Tuple, List, Dict, Optional
 from pathfinding_problem import PathfindingProblem
-from world import World
+from world import World, GridWorld
+from heuristics import HEURISTIC_NAMES
+from algorithms import USES_HEURISTIC, run
+from components import unreachable
+from path_cache import PathCache
+from search_stats import SearchStats
+from search_worker import SearchCancelled, SearchWorker
 from dfs_migliorato import dfs  # e non dfs da quello vecchio
 
 # === CONFIGURAZIONE ===
 CELL_SIZE = 10
 SIDE_PANEL_WIDTH = 300
 UNDER_PANEL_HEIGHT = 150
+ALGORITHMS_PER_ROW = 4  # pulsanti degli algoritmi per riga del pannello laterale
 
 # === COLORI ===
 WHITE = (255, 255, 255)
@@ -24,6 +34,14 @@ BLUE = (0, 0, 255)
 YELLOW = (255, 255, 0)
 ORANGE = (255, 165, 0)
 CYAN = (0, 255, 255)
+EXPLORED_COLOR = (255, 255, 0, 60)
+PATH_COLOR = (255, 0, 255, 120)
+
+# === ANIMAZIONE DELLA RICERCA ===
+# Stati espansi mostrati per frame: almeno PLAYBACK_MIN_STEP, di più se ne restano
+# molti, così anche le ricerche grandi si vedono in pochi secondi
+PLAYBACK_MIN_STEP = 20
+PLAYBACK_FRAMES = 30
 
 # === CONFIGURAZIONE TERRENI ===
 class TerrainType:
@@ -46,6 +64,7 @@ class PathfindingGUI:
         pygame.init()
         
         # Carica immagine
+        self.image_path = image_path
         self.image = pygame.image.load(image_path)
         self.img_width, self.img_height = self.image.get_size()
         
@@ -69,8 +88,15 @@ class PathfindingGUI:
         self.cell_width = self.img_width // self.num_cols
         self.cell_height = self.img_height // self.num_rows
         
-        # Superficie trasparente per la griglia
+        # Superficie trasparente per la griglia: resta disegnata tra un frame e l'altro
+        # (_refresh_overlay) e sulla finestra si ridisegnano solo i rettangoli sporchi
         self.grid_surface = pygame.Surface((self.img_width, self.img_height), pygame.SRCALPHA)
+        self.overlay_of = None
+        self.overlay_sizes = None
+        self.path_cells = set()
+        self.explored_cells = set()
+        self.markers_drawn = (None, None)
+        self.dirty_rects = []
         
         # Griglia dati (0 = vuoto, stringa = tipo terreno)
         # Inizializziamo la griglia senza percorsi (vuota)
@@ -79,10 +105,43 @@ class PathfindingGUI:
         # Stato inizializzazione
         self.current_terrain = "verde" 
         self.selected_algorithm = "A*"
+        self.selected_heuristic = "chebyshev"
+        self.astar_weight = 1.0
         self.start_pos = None
         self.goal_pos = None
         self.path = []
         self.explored_nodes = []
+
+        # Celle modificate dal mouse, in ordine: le strutture incrementali (HPA*)
+        # ricordano fin dove le hanno già applicate (HPA*, D* Lite)
+        self.edits = []
+        self.hpa = None
+        self.hpa_edits_seen = 0
+        self.dstar = None
+        self.dstar_edits_seen = 0
+        # Componenti connesse delle celle dipinte: si aggiornano a ogni pennellata e dicono
+        # subito se il goal è irraggiungibile (components)
+        self.components = None
+
+        # Campo di flusso verso il goal (FLOW): si riusa per ogni start finché non cambiano
+        # goal, celle o costi; la sovrapposizione si disegna una volta per campo
+        self.flow = None
+        self.flow_key = None
+        self.flow_surface = None
+        self.show_flow = True
+
+        # Contatori della ricerca (search_stats); tasto M per il picco di memoria con tracemalloc
+        self.stats = SearchStats()
+
+        # Cache LRU delle query, si svuota da sola se cambiano celle o costi
+        self.path_cache = PathCache()
+
+        # Ricerca in corso nel thread di search_worker e stati espansi ancora da mostrare
+        self.worker = SearchWorker()
+        self.job = None
+        self.playback = []
+        self.improvements_seen = 0
+        self.search_status = ""
         
         # Risultati inizializzazione
         self.last_cost = 0
@@ -97,6 +156,17 @@ class PathfindingGUI:
         self.cost_inputs = {}
         
         self._create_ui_elements()
+
+        # Il pannello laterale può essere più alto dell'immagine: la finestra si adatta
+        self.top_height = max(self.img_height, max(b.y + b.height for b in self.buttons) + 70)
+        self.win_height = self.top_height + UNDER_PANEL_HEIGHT
+        self.win = pygame.display.set_mode((self.win_width, self.win_height))
+        self.map_rect = pygame.Rect(0, 0, self.img_width, self.top_height)
+        self.panel_rects = [
+            pygame.Rect(self.img_width, 0, SIDE_PANEL_WIDTH, self.top_height),
+            pygame.Rect(0, self.top_height, self.win_width, UNDER_PANEL_HEIGHT)
+        ]
+        self.dirty_rects.append(self.map_rect)
         
     def _create_ui_elements(self):
         panel_x = self.img_width + 15
@@ -104,6 +174,7 @@ class PathfindingGUI:
         
         # Pulsanti selezione terreno con layout corretto
         y_offset += 30
+        self.terrain_rows_y = y_offset
         terrain_items = list(terrain_types.items())
         for i, (terrain_key, terrain) in enumerate(terrain_items):
             # Pulsante terreno
@@ -136,14 +207,17 @@ class PathfindingGUI:
             )
             self.buttons.extend([btn, minus_btn, plus_btn])
         
-        # Pulsanti algoritmi
-        y_offset += 180
-        algorithms = ["A*", "BFS", "DFS", "UCS"]
+        # Pulsanti algoritmi: titolo sotto l'ultima riga dei terreni, poi le righe di pulsanti
+        y_offset += 40 * len(terrain_items) + 10
+        self.algorithm_title_y = y_offset
+        y_offset += 30
+        algorithms = ["A*", "BFS", "DFS", "UCS", "JPS", "BI-A*", "BI-UCS", "HPA*", "D*LITE", "FLOW", "ARA*",
+                      "IDA*", "SMA*", "NP-BFS", "NP-UCS"]
         for i, algo in enumerate(algorithms):
             btn = Button(
-                panel_x + (i % 2) * 135,
-                y_offset + (i // 2) * 40,
-                125, 35,
+                panel_x + (i % ALGORITHMS_PER_ROW) * 66,
+                y_offset + (i // ALGORITHMS_PER_ROW) * 40,
+                62, 35,
                 algo,
                 CYAN,
                 lambda a=algo: self._select_algorithm(a)
@@ -151,8 +225,36 @@ class PathfindingGUI:
             self.algorithm_buttons.append(btn)
             self.buttons.append(btn)
         
-        # Pulsanti controllo
-        y_offset += 90
+        # Euristica e peso di A* (f = g + w·h)
+        y_offset += 40 * -(-len(algorithms) // ALGORITHMS_PER_ROW) + 10
+        self.heuristic_row_y = y_offset
+        self.heuristic_button = Button(
+            panel_x, y_offset,
+            125, 35,
+            self.selected_heuristic.upper(),
+            YELLOW,
+            self._cycle_heuristic
+        )
+        self.buttons.append(self.heuristic_button)
+        self.buttons.append(Button(
+            panel_x + 140, y_offset,
+            30, 35,
+            "-",
+            LIGHT_GRAY,
+            lambda: self._change_weight(-0.5)
+        ))
+        self.buttons.append(Button(
+            panel_x + 220, y_offset,
+            30, 35,
+            "+",
+            LIGHT_GRAY,
+            lambda: self._change_weight(0.5)
+        ))
+
+        # Pulsanti controllo, sotto il loro titolo
+        y_offset += 45
+        self.controls_title_y = y_offset
+        y_offset += 30
         self.buttons.append(Button(
             panel_x, y_offset,
             125, 35,
@@ -187,11 +289,45 @@ class PathfindingGUI:
         y_offset += 45
         self.buttons.append(Button(
             panel_x, y_offset,
-            260, 35,
+            125, 35,
             "CLEAR ALL",
             DARK_GRAY,
             self._clear_all
         ))
+        self.buttons.append(Button(
+            panel_x + 135, y_offset,
+            125, 35,
+            "ANNULLA",
+            DARK_GRAY,
+            self._cancel_search
+        ))
+
+        # Salvataggio e caricamento della mappa disegnata (formato di map_io)
+        y_offset += 45
+        self.buttons.append(Button(
+            panel_x, y_offset,
+            125, 35,
+            "SALVA MAPPA",
+            LIGHT_GRAY,
+            self._save_map
+        ))
+        self.buttons.append(Button(
+            panel_x + 135, y_offset,
+            125, 35,
+            "CARICA MAPPA",
+            LIGHT_GRAY,
+            self._load_map
+        ))
+
+        # Terreni riconosciuti dai colori dell'immagine (classify)
+        y_offset += 45
+        self.buttons.append(Button(
+            panel_x, y_offset,
+            260, 35,
+            "CLASSIFICA IMMAGINE",
+            LIGHT_GRAY,
+            self._classify_image
+        ))
         
     def _select_terrain(self, terrain_key: str):
         """Seleziona il terreno corrente"""
@@ -203,10 +339,80 @@ class PathfindingGUI:
         """Seleziona l'algoritmo"""
         self.selected_algorithm = algo
         
+    def _cycle_heuristic(self):
+        """Passa all'euristica successiva del registro"""
+        names = HEURISTIC_NAMES
+        self.selected_heuristic = names[(names.index(self.selected_heuristic) + 1) % len(names)]
+        self.heuristic_button.text = self.selected_heuristic.upper()
+
+    def _change_weight(self, delta: float):
+        """Modifica il peso dell'euristica (1 = A* ottimo)"""
+        self.astar_weight = max(1.0, self.astar_weight + delta)
+
     def _change_cost(self, terrain_key: str, delta: int):
         """Modifica il costo di un terreno"""
         terrain_types[terrain_key].cost = max(1, terrain_types[terrain_key].cost + delta)
         
+    def _save_map(self):
+        """
+        Salva celle disegnate e costi dei terreni, di default accanto all'immagine.
+        Il formato dipende dall'estensione: .bmap binario (map_io), .map testuale
+        """
+        from map_io import save_map, save_binary_map
+        path = filedialog.asksaveasfilename(
+            title="Salva la mappa",
+            initialfile=os.path.basename(self.image_path) + ".bmap",
+            defaultextension=".bmap",
+            filetypes=[("Mappe binarie", "*.bmap"), ("Mappe testuali", "*.map")]
+        )
+        if not path:
+            return
+        grid = GridWorld.from_rows(self.grid, list(terrain_types))
+        save = save_map if path.endswith(".map") else save_binary_map
+        save(path, grid, {k: terrain_types[k].cost for k in terrain_types})
+        print(f"Mappa salvata in {path}")
+
+    def _load_map(self):
+        """Carica una mappa salvata (binaria o testuale) con le stesse dimensioni della griglia corrente"""
+        from map_io import load_map, grid_to_rows
+        path = filedialog.askopenfilename(
+            title="Carica la mappa",
+            filetypes=[("Mappe", "*.bmap *.map")]
+        )
+        if not path:
+            return
+        grid, costs = load_map(path)
+        if (grid.x_lim, grid.y_lim) != (self.num_rows, self.num_cols):
+            print(f"La mappa è {grid.x_lim}x{grid.y_lim}, la griglia corrente {self.num_rows}x{self.num_cols}")
+            return
+        self._clear_all()
+        # le celle senza terreno non esistono nella GUI: diventano "bianco" (costo 1 come di default)
+        self.grid = grid_to_rows(grid, plain="bianco")
+        for name, cost in costs.items():
+            if name in terrain_types:
+                terrain_types[name].cost = cost
+        print(f"Mappa caricata da {path}")
+
+    def _classify_image(self):
+        """
+        Riempie la griglia con i terreni riconosciuti dai colori dell'immagine (tasto C).
+        La tavolozza di default è quella di classify; se accanto all'immagine c'è
+        <immagine>.palette.json ({"terreno": [[r, g, b], ...], "max_distance": 60}) si usa quella.
+        """
+        from classify import DEFAULT_MAX_DISTANCE, classify_grid, surface_pixels
+        palette, max_distance = None, DEFAULT_MAX_DISTANCE
+        palette_path = self.image_path + ".palette.json"
+        if os.path.exists(palette_path):
+            with open(palette_path) as f:
+                palette = json.load(f)
+            max_distance = palette.pop("max_distance", max_distance)
+        start = time.perf_counter()
+        grid = classify_grid(surface_pixels(self.image), self.num_rows, self.num_cols,
+                             self.cell_height, self.cell_width, palette, max_distance)
+        self._clear_all()
+        self.grid = grid
+        print(f"Immagine classificata in {(time.perf_counter() - start) * 1000:.0f} ms")
+
     def _set_start_mode(self):
         """Modalità impostazione punto di partenza"""
         self.setting_start = True
@@ -219,12 +425,23 @@ class PathfindingGUI:
         
     def _clear_path(self):
         """Cancella solo il percorso"""
+        self._cancel_search()
         self.path = []
         self.explored_nodes = []
         
     def _clear_all(self):
         """Cancella tutto"""
+        self._cancel_search()
         self.grid = [[0 for _ in range(self.num_cols)] for _ in range(self.num_rows)]
+        self.edits = []
+        self.hpa = None
+        self.hpa_edits_seen = 0
+        self.dstar = None
+        self.dstar_edits_seen = 0
+        self.components = None
+        self.flow = None
+        self.flow_key = None
+        self.flow_surface = None
         self.start_pos = None
         self.goal_pos = None
         self.path = []
@@ -240,24 +457,16 @@ class PathfindingGUI:
             return
 
         # === CREA IL MONDO SOLO CON LE CELLE DISEGNATE ===
-        walls = set()
-        for row in range(self.num_rows):
-            for col in range(self.num_cols):
-                terrain = self.grid[row][col]
-
-                # Le celle NON disegnate (valore = 0) sono muri
-                if terrain == 0:
-                    walls.add((row, col))
-
-        terrain_map = {}
-        for row in range(self.num_rows):
-            for col in range(self.num_cols):
-                terrain = self.grid[row][col]
-                if terrain and terrain in terrain_types:
-                    terrain_map[(row, col)] = terrain
+        # Le celle NON disegnate (valore = 0) sono muri; la griglia compatta
+        # evita di costruire il set dei muri e il dict dei terreni
+        grid = GridWorld.from_rows(self.grid, list(terrain_types))
+        if self.components is None:
+            self.components = grid.components
+        # la ricerca gira in un altro thread mentre si può continuare a dipingere: usa una copia
+        grid.components = self.components.copy()
 
         # Crea oggetto World (istanza!)
-        world = World(self.num_rows, self.num_cols, walls, terrain_map)
+        world = World.from_grid(grid)
 
         # Mappa dei costi
         cost_map = {
@@ -267,41 +476,190 @@ class PathfindingGUI:
         # Crea problema (usa l'istanza `world`)
         problem = PathfindingProblem(world, self.start_pos, self.goal_pos, cost_map)
 
-        # Algoritmo
-        start_time = time.time()
-
-        if self.selected_algorithm == "DFS":
-            from dfs_migliorato import dfs
-            path, explored = dfs(problem)
-
-        elif self.selected_algorithm == "BFS":
-            from bfs import bfs
-            path, explored = bfs(problem)
-        
-        elif self.selected_algorithm == "UCS":
-            from ucs import ucs
-            path, explored = ucs(problem)
-        elif self.selected_algorithm == "A*":
-            from a_star import astar, manhattan_heuristic
-            path, explored = astar(problem, heuristic=manhattan_heuristic)
-        
+        # La ricerca gira nel thread di self.worker; la GUI ne mostra le espansioni man mano
+        # (_update_search) e ne legge il risultato quando ha finito. Le query già viste
+        # (stessa griglia, costi, algoritmo e opzioni) si leggono dalla cache; HPA*, D* Lite e il
+        # campo di flusso tengono il loro stato tra una ricerca e l'altra, aggiornandolo con le
+        # celle dipinte fino a questo momento (edit_count)
+        algorithm = self.selected_algorithm
+        heuristic, weight = self.selected_heuristic, self.astar_weight
+        edit_count = len(self.edits)
 
+        def solve(stats):
+            if unreachable(problem):
+                stats.start()  # start e goal in componenti diverse: nessuna ricerca
+                stats.stop()
+                return [], []
+            # Le tabelle ALT si salvano accanto alla mappa e si ricalcolano solo se
+            # cambiano le celle o i costi (la chiave è PathfindingProblem.worldKey)
+            if heuristic == "alt" and algorithm in USES_HEURISTIC:
+                from landmarks import get_landmarks
+                get_landmarks(problem, self.image_path + ".alt")
+            cached = self.path_cache.get(problem, algorithm, heuristic, weight)
+            if cached is not None:
+                stats.start()  # nessuna ricerca: contatori a zero
+                stats.stop()
+                return cached
+            try:
+                if algorithm == "HPA*":
+                    path, explored = self._run_hpa(grid, problem, edit_count, stats)
+                elif algorithm == "D*LITE":
+                    path, explored = self._run_dstar(grid, problem, edit_count, stats)
+                elif algorithm == "FLOW":
+                    path, explored = self._run_flow(problem, stats)
+                else:
+                    path, explored = run(problem, algorithm, heuristic, weight, stats=stats)
+            except SearchCancelled:
+                # una ricerca interrotta lascia a metà lo stato riusabile: si ricostruirà
+                if algorithm == "HPA*":
+                    self.hpa = None
+                elif algorithm == "D*LITE":
+                    self.dstar = None
+                elif algorithm == "FLOW":
+                    self.flow = self.flow_key = None
+                raise
+            self.path_cache.put(problem, algorithm, heuristic, weight, path, explored)
+            return path, explored
 
+        self._clear_path()
+        self.job = self.worker.submit(solve, SearchStats(trace_memory=self.stats.trace_memory))
+        self.improvements_seen = 0
+        self.search_status = "Ricerca in corso..."
 
+    def _cancel_search(self):
+        """Annulla la ricerca in corso e la sua animazione (tasto ESC)"""
+        if self.job is not None:
+            self.job.cancel()
+            self.job = None
+            if self.improvements_seen:
+                self.search_status += " (interrotta)"  # ARA*: resta il percorso migliore trovato
+            else:
+                self.search_status = "Ricerca annullata"
+        self.playback = []
 
+    def _update_search(self):
+        """
+        Ogni frame: prende gli stati espansi arrivati dal thread della ricerca e ne mostra
+        un lotto, così l'esplorazione si vede crescere; a ricerca finita e animazione conclusa
+        mostra percorso e risultati
+        """
+        job = self.job
+        if job is None:
+            return
+        if len(job.improvements) > self.improvements_seen:
+            # ARA*: il percorso migliore finora si mostra subito, con il suo bound
+            self.improvements_seen = len(job.improvements)
+            path, _, bound = job.improvements[-1]
+            self.path = path
+            self.last_path_length = len(path)
+            self.last_cost = self._calculate_path_cost()
+            self.search_status = f"Costo al più x{bound:.2f} l'ottimo"
+        self.playback.extend(job.poll())
+        if job.done and not self.playback and job.result is not None and not self.explored_nodes:
+            # nessuna espansione notificata (cache, campo di flusso già pronto): si anima il risultato
+            self.playback = list(job.result[1])
+        if self.playback:
+            step = max(PLAYBACK_MIN_STEP, len(self.playback) // PLAYBACK_FRAMES)
+            self.explored_nodes.extend(self.playback[:step])
+            del self.playback[:step]
+            return
+        if not job.done:
+            return
 
-        end_time = time.time()
+        self.job = None
+        if job.error is not None:
+            self.search_status = "Ricerca fallita"
+            print(f"Ricerca fallita: {job.error!r}")
+            return
+        if job.result is None:
+            self.search_status = "Ricerca annullata"
+            return
+        path, explored = job.result
+        stats = job.stats
 
         # Salva risultati
+        self.stats = stats
         self.path = path
         self.explored_nodes = explored
-        self.last_time = (end_time - start_time) * 1000
-        self.last_nodes_expanded = len(explored)
+        self.last_time = job.time_ns / 1e6
+        self.last_nodes_expanded = stats.expanded
         self.last_path_length = len(path)
         self.last_cost = self._calculate_path_cost()
+        if not path and not stats.expanded:
+            self.search_status = "Goal non raggiungibile dallo start"
+        elif not job.improvements:
+            self.search_status = ""  # ARA*: resta il bound dell'ultimo percorso
 
         print(f"Ricerca completata. Costo: {self.last_cost}, Nodi: {self.last_nodes_expanded}")
 
+    def _run_hpa(self, grid, problem, edit_count, stats):
+        """HPA*: riusa l'astrazione della ricerca precedente aggiornando solo i cluster modificati"""
+        from hpa import HierarchicalMap
+        hpa = self.hpa
+        if (hpa is None or hpa.cost_by_code != problem.cost_by_code
+                or hpa.grid.terrain_names != grid.terrain_names):
+            self.hpa = HierarchicalMap(grid, problem.cost_by_code)
+        else:
+            hpa.update(grid, set(self.edits[self.hpa_edits_seen:edit_count]))
+        self.hpa_edits_seen = edit_count
+        self.hpa.stats = stats
+        return self.hpa.search(problem)
+
+    def _run_dstar(self, grid, problem, edit_count, stats):
+        """
+        D* Lite: con gli stessi start e goal ripara la ricerca precedente con le celle dipinte
+        e i costi cambiati da allora; altrimenti riparte da zero
+        """
+        from dstar_lite import DStarLite
+        dstar = self.dstar
+        changed = set(self.edits[self.dstar_edits_seen:edit_count])
+        self.dstar_edits_seen = edit_count
+        if (dstar is None or dstar.init != problem.init or dstar.goal != grid.index(*problem.goal)
+                or not dstar.update_cells(grid, changed) or not dstar.update_costs(problem.cost_by_code)):
+            self.dstar = DStarLite(problem)
+        self.dstar.stats = stats
+        return self.dstar.plan()
+
+    def _run_flow(self, problem, stats):
+        """
+        Campo di flusso: un solo Dijkstra all'indietro dal goal, poi il percorso di ogni start
+        si legge seguendo le direzioni. Con lo stesso goal e lo stesso mondo si riusa il campo.
+        """
+        from dijkstra import FlowField
+        key = (problem.worldKey(), problem.goal)
+        if self.flow is None or self.flow_key != key:
+            self.flow = FlowField(problem, stats=stats)
+            self.flow_key = key
+            self.flow_surface = self._render_flow(self.flow)
+            explored = self.flow.reached()
+        else:
+            stats.start()  # campo già pronto: nessuna espansione
+            stats.stop()
+            explored = []
+        return self.flow.path(problem.init), explored
+
+    def _render_flow(self, field):
+        """Sovrapposizione del campo: colore dal blu (vicino) al rosso (lontano) e direzione del passo"""
+        from dijkstra import INF, NO_DIRECTION
+        from pathfinding_problem import DIRECTIONS
+        surface = pygame.Surface((self.img_width, self.img_height), pygame.SRCALPHA)
+        finite = [d for d in field.dist if d != INF]
+        far = max(finite) or 1
+        w, h = self.cell_width, self.cell_height
+        for i, d in enumerate(field.dist):
+            if d == INF:
+                continue
+            row, col = field.grid.coords(i)
+            t = d / far
+            rect = pygame.Rect(col * w, row * h, w, h)
+            pygame.draw.rect(surface, (int(255 * t), 0, int(255 * (1 - t)), 90), rect)
+            k = field.direction[i]
+            if k != NO_DIRECTION:
+                dx, dy = DIRECTIONS[k]
+                cx, cy = rect.center
+                pygame.draw.line(surface, (255, 255, 255, 160), (cx, cy), (cx + dy * w // 2, cy + dx * h // 2))
+        return surface
+
     def _calculate_path_cost(self) -> int:
         """Calcola il costo totale del percorso"""
         if not self.path:
@@ -332,73 +690,123 @@ class PathfindingGUI:
                     self.goal_pos = (row, col)
                     self.setting_goal = False
                 elif button == 1:  # Click sinistro
-                    self.grid[row][col] = self.current_terrain
+                    self._paint_cell(row, col, self.current_terrain)
                 elif button == 3:  # Click destro
-                    self.grid[row][col] = 0
+                    self._paint_cell(row, col, 0)
+
+    def _paint_cell(self, row: int, col: int, terrain):
+        """Modifica una cella e la registra tra le modifiche"""
+        if self.grid[row][col] != terrain:
+            self.grid[row][col] = terrain
+            self.edits.append((row, col))
+            if self.components is not None:
+                self.components.update_cell(row, col, bool(terrain))
+            if self.overlay_of is not None and self.overlay_of[0] is self.grid:
+                self._redraw_cell(row, col)
                     
+    def _cell_rect(self, row: int, col: int) -> pygame.Rect:
+        return pygame.Rect(col * self.cell_width, row * self.cell_height, self.cell_width, self.cell_height)
+
+    def _visible_flow(self):
+        """Sovrapposizione del campo di flusso se è visibile (tasto F), altrimenti None"""
+        if self.show_flow and self.selected_algorithm == "FLOW":
+            return self.flow_surface
+        return None
+
+    def _refresh_overlay(self):
+        """
+        Ricostruisce grid_surface solo se è cambiato ciò che ci è disegnato sopra: la griglia
+        sostituita (CLEAR ALL, CARICA MAPPA, CLASSIFICA IMMAGINE), un nuovo risultato o il campo
+        di flusso visibile. Le celle dipinte col mouse si aggiornano una alla volta (_paint_cell).
+        """
+        drawn = (self.grid, self.path, self.explored_nodes, self._visible_flow())
+        sizes = (len(self.path), len(self.explored_nodes))
+        if self.overlay_of is not None and all(a is b for a, b in zip(drawn, self.overlay_of)):
+            if self.overlay_sizes == sizes:
+                return
+            if self.overlay_sizes[0] == sizes[0] and self.overlay_sizes[1] < sizes[1]:
+                # esplorazione che cresce durante la ricerca: solo le celle nuove
+                new = self.explored_nodes[self.overlay_sizes[1]:]
+                self.overlay_sizes = sizes
+                if drawn[3] is None:
+                    for row, col in new:
+                        self.explored_cells.add((row, col))
+                        self._redraw_cell(row, col)
+                return
+        self.overlay_of, self.overlay_sizes = drawn, sizes
+        flow = drawn[3]
+        self.path_cells = set(self.path)
+        # il campo di flusso copre già gli esplorati
+        self.explored_cells = set() if flow is not None else set(self.explored_nodes)
+
+        # un pixel per cella (terreni, esplorati, percorso), poi ingrandito con una sola scale
+        codes = {name: i for i, name in enumerate(terrain_types, 1)}
+        colors = np.array([(0, 0, 0, 0)] + [t.color for t in terrain_types.values()], dtype=np.uint8)
+        rgba = colors[np.array([[codes.get(t, 0) for t in row] for row in self.grid],
+                               dtype=np.intp).reshape(self.num_rows, self.num_cols)]
+        if self.explored_cells:
+            rows, cols = np.array(self.explored_nodes, dtype=np.intp).reshape(-1, 2).T
+            rgba[rows, cols] = EXPLORED_COLOR
+        if self.path and flow is None:
+            rows, cols = np.array(self.path, dtype=np.intp).reshape(-1, 2).T
+            rgba[rows, cols] = PATH_COLOR
+        cells = pygame.image.frombuffer(rgba.tobytes(), (self.num_cols, self.num_rows), "RGBA")
+        self.grid_surface = pygame.transform.scale(
+            cells, (self.num_cols * self.cell_width, self.num_rows * self.cell_height))
+        if flow is not None:
+            # percorso sopra il campo, come prima che il campo fosse disegnato
+            self.grid_surface.blit(flow, (0, 0))
+            for row, col in self.path:
+                self.grid_surface.fill(PATH_COLOR, self._cell_rect(row, col))
+        self.dirty_rects.append(self.map_rect)
+
+    def _redraw_cell(self, row: int, col: int):
+        """Aggiorna una sola cella di grid_surface (dopo _paint_cell)"""
+        rect = self._cell_rect(row, col)
+        terrain = self.grid[row][col]
+        if (row, col) in self.explored_cells:
+            color = EXPLORED_COLOR
+        elif terrain and terrain in terrain_types:
+            color = terrain_types[terrain].color
+        else:
+            color = (0, 0, 0, 0)
+        self.grid_surface.fill(color, rect)
+        flow = self.overlay_of[3] if self.overlay_of else None
+        if flow is not None:
+            self.grid_surface.blit(flow, rect, rect)
+        if (row, col) in self.path_cells:
+            self.grid_surface.fill(PATH_COLOR, rect)
+        self.dirty_rects.append(rect)
+
     def _draw_grid(self):
-        """Disegna la griglia con i terreni"""
-        self.grid_surface.fill((0, 0, 0, 0))
-        
-        # Disegna i terreni
-        for row in range(self.num_rows):
-            for col in range(self.num_cols):
-                terrain = self.grid[row][col]
-                if terrain and terrain in terrain_types:
-                    color = terrain_types[terrain].color
-                    rect = pygame.Rect(
-                        col * self.cell_width,
-                        row * self.cell_height,
-                        self.cell_width,
-                        self.cell_height
-                    )
-                    pygame.draw.rect(self.grid_surface, color, rect)
-                    
-        # Disegna nodi esplorati
-        for row, col in self.explored_nodes:
-            rect = pygame.Rect(
-                col * self.cell_width,
-                row * self.cell_height,
-                self.cell_width,
-                self.cell_height
-            )
-            pygame.draw.rect(self.grid_surface, (255, 255, 0, 60), rect)
-            
-        # Disegna il percorso
-        for row, col in self.path:
-            rect = pygame.Rect(
-                col * self.cell_width,
-                row * self.cell_height,
-                self.cell_width,
-                self.cell_height
-            )
-            pygame.draw.rect(self.grid_surface, (255, 0, 255, 120), rect)
-            
-        # Disegna start e goal
-        if self.start_pos:
-            row, col = self.start_pos
-            rect = pygame.Rect(
-                col * self.cell_width,
-                row * self.cell_height,
-                self.cell_width,
-                self.cell_height
-            )
-            pygame.draw.rect(self.grid_surface, GREEN, rect)
-            
-        if self.goal_pos:
-            row, col = self.goal_pos
-            rect = pygame.Rect(
-                col * self.cell_width,
-                row * self.cell_height,
-                self.cell_width,
-                self.cell_height
-            )
-            pygame.draw.rect(self.grid_surface, RED, rect)
-            
+        """
+        Ridisegna sulla finestra immagine, griglia, start e goal solo nei rettangoli sporchi.
+        Restituisce i rettangoli ridisegnati, da passare a pygame.display.update
+        """
+        markers = (self.start_pos, self.goal_pos)
+        if markers != self.markers_drawn:
+            for pos in self.markers_drawn + markers:
+                if pos:
+                    self.dirty_rects.append(self._cell_rect(*pos))
+            self.markers_drawn = markers
+
+        updated = self.dirty_rects
+        self.dirty_rects = []
+        for rect in updated:
+            self.win.fill(BLACK, rect)
+            self.win.blit(self.image, rect, rect)
+            self.win.blit(self.grid_surface, rect, rect)
+            for pos, color in ((self.start_pos, GREEN), (self.goal_pos, RED)):
+                if pos:
+                    cell = self._cell_rect(*pos).clip(rect)
+                    if cell:
+                        self.win.fill(color, cell)
+        return updated
+
     def _draw_side_panel(self):
         """Disegna il pannello laterale"""
         # Sfondo pannello
-        pygame.draw.rect(self.win, DARK_GRAY, (self.img_width, 0, SIDE_PANEL_WIDTH, self.img_height))
+        pygame.draw.rect(self.win, DARK_GRAY, (self.img_width, 0, SIDE_PANEL_WIDTH, self.top_height))
         
         # Titolo
         title = self.font_large.render("CONTROLLI", True, WHITE)
@@ -411,7 +819,7 @@ class PathfindingGUI:
         self.win.blit(terrain_title, (self.img_width + 15, y_offset))
         
         # Mostra costi terreni e indicatore selezione
-        y_offset += 35
+        y_offset = self.terrain_rows_y
         for i, (terrain_key, terrain) in enumerate(terrain_types.items()):
             # Indicatore terreno selezionato
             if self.current_terrain == terrain_key:
@@ -422,60 +830,82 @@ class PathfindingGUI:
             cost_rect = cost_text.get_rect(center=(self.img_width + 195, y_offset + i * 40 + 17))
             self.win.blit(cost_text, cost_rect)
             
-        # Sezione algoritmi
-        y_offset += 190
+        # Sezione algoritmi: le posizioni vengono da _create_ui_elements e seguono le righe di pulsanti
         algo_title = self.font_medium.render("Algoritmo:", True, WHITE)
-        self.win.blit(algo_title, (self.img_width + 15, y_offset))
+        self.win.blit(algo_title, (self.img_width + 15, self.algorithm_title_y))
         
         # Indicatore algoritmo selezionato
         for btn in self.algorithm_buttons:
             if btn.text == self.selected_algorithm:
                 pygame.draw.rect(self.win, WHITE, (btn.x - 3, btn.y - 3, btn.width + 6, btn.height + 6), 2)
                 
+        # Peso dell'euristica centrato tra i pulsanti +/-
+        weight_text = self.font_large.render(f"{self.astar_weight:g}", True, WHITE)
+        weight_rect = weight_text.get_rect(center=(self.img_width + 195, self.heuristic_row_y + 17))
+        self.win.blit(weight_text, weight_rect)
+
         # Sezione controlli
-        y_offset += 90
         controls_title = self.font_medium.render("Controlli:", True, WHITE)
-        self.win.blit(controls_title, (self.img_width + 15, y_offset))
+        self.win.blit(controls_title, (self.img_width + 15, self.controls_title_y))
         
         # Indicatori start/goal se impostati
         if self.start_pos:
             start_text = self.font_small.render(f"Start: {self.start_pos}", True, GREEN)
-            self.win.blit(start_text, (self.img_width + 15, self.img_height - 60))
+            self.win.blit(start_text, (self.img_width + 15, self.top_height - 60))
             
         if self.goal_pos:
             goal_text = self.font_small.render(f"Goal: {self.goal_pos}", True, RED)
-            self.win.blit(goal_text, (self.img_width + 15, self.img_height - 40))
+            self.win.blit(goal_text, (self.img_width + 15, self.top_height - 40))
+
+        # Stato della ricerca nel thread (ESC o ANNULLA per interromperla)
+        if self.search_status:
+            status = self.search_status
+            if self.job is not None:
+                status += f" {len(self.explored_nodes)} esplorati"
+            status_text = self.font_small.render(status, True, YELLOW)
+            self.win.blit(status_text, (self.img_width + 15, self.top_height - 20))
                 
     def _draw_bottom_panel(self):
         """Disegna il pannello inferiore con i risultati"""
         # Sfondo
-        pygame.draw.rect(self.win, BLACK, (0, self.img_height, self.win_width, UNDER_PANEL_HEIGHT))
-        pygame.draw.line(self.win, WHITE, (0, self.img_height), (self.win_width, self.img_height), 2)
+        pygame.draw.rect(self.win, BLACK, (0, self.top_height, self.win_width, UNDER_PANEL_HEIGHT))
+        pygame.draw.line(self.win, WHITE, (0, self.top_height), (self.win_width, self.top_height), 2)
         
         # Titolo
         title = self.font_large.render("RISULTATI", True, WHITE)
-        self.win.blit(title, (10, self.img_height + 10))
+        self.win.blit(title, (10, self.top_height + 10))
         
         # Risultati in colonne
-        y_base = self.img_height + 50
-        col_width = self.win_width // 4
+        y_base = self.top_height + 45
+        col_width = self.win_width // 3
+        stats = self.stats
+        cache = self.path_cache
+        memory = "-" if stats.peak_memory is None else f"{stats.peak_memory / 1024:.0f} KiB"
         
         results = [
             ("Costo totale:", f"{self.last_cost}"),
             ("Tempo (ms):", f"{self.last_time:.2f}"),
             ("Nodi espansi:", f"{self.last_nodes_expanded}"),
-            ("Lungh. percorso:", f"{self.last_path_length}")
+            ("Lungh. percorso:", f"{self.last_path_length}"),
+            ("Push / pop:", f"{stats.pushes} / {stats.pops}"),
+            ("Generati:", f"{stats.generated}"),
+            ("Voci superate:", f"{stats.stale}"),
+            ("Frontiera max:", f"{stats.peak_frontier}"),
+            ("Chiusi max:", f"{stats.peak_closed}"),
+            ("Memoria (M):", memory),
+            ("Cache (hit/miss):", f"{cache.hits + cache.subpath_hits}/{cache.misses}"),
+            ("Ricerca (ms):", f"{stats.time_ns / 1e6:.2f}")
         ]
         
         for i, (label, value) in enumerate(results):
-            x = 10 + (i % 2) * col_width * 2
-            y = y_base + (i // 2) * 40
+            x = 10 + (i % 3) * col_width
+            y = y_base + (i // 3) * 25
             
             label_text = self.font_medium.render(label, True, LIGHT_GRAY)
-            value_text = self.font_large.render(value, True, WHITE)
+            value_text = self.font_medium.render(value, True, WHITE)
             
             self.win.blit(label_text, (x, y))
-            self.win.blit(value_text, (x + 150, y))
+            self.win.blit(value_text, (x + 140, y))
             
     def run(self):
         """Loop principale"""
@@ -486,6 +916,8 @@ class PathfindingGUI:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
+                elif event.type == pygame.VIDEOEXPOSE:
+                    self.dirty_rects.append(self.map_rect)
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     self._handle_mouse_click(pygame.mouse.get_pos(), event.button)
                 elif event.type == pygame.KEYDOWN:
@@ -504,6 +936,14 @@ class PathfindingGUI:
                         self._set_goal_mode()
                     elif event.key == pygame.K_SPACE:
                         self._run_pathfinding()
+                    elif event.key == pygame.K_ESCAPE:
+                        self._cancel_search()
+                    elif event.key == pygame.K_f:
+                        self.show_flow = not self.show_flow
+                    elif event.key == pygame.K_c:
+                        self._classify_image()
+                    elif event.key == pygame.K_m:
+                        self.stats.trace_memory = not self.stats.trace_memory
                         
             # Gestione click continuo
             mouse_pressed = pygame.mouse.get_pressed()
@@ -514,10 +954,12 @@ class PathfindingGUI:
             for button in self.buttons:
                 button.update()
                 
-            # Disegna tutto
-            self.win.blit(self.image, (0, 0))
-            self._draw_grid()
-            self.win.blit(self.grid_surface, (0, 0))
+            # Espansioni arrivate dalla ricerca in corso
+            self._update_search()
+
+            # Disegna: della mappa solo le parti cambiate, i pannelli ogni volta
+            self._refresh_overlay()
+            updated = self._draw_grid()
             self._draw_side_panel()
             self._draw_bottom_panel()
             
@@ -525,9 +967,10 @@ class PathfindingGUI:
             for button in self.buttons:
                 button.draw(self.win)
                 
-            pygame.display.flip()
+            pygame.display.update(updated + self.panel_rects)
             clock.tick(60)
             
+        self.worker.close()
         pygame.quit()
 
 
@@ -0,0 +1,82 @@
+# Euristiche per A* e registro per sceglierle per nome.
+# Nel PathfindingProblem ogni mossa, anche diagonale, costa quanto il terreno della cella
+# di arrivo, quindi il numero minimo di mosse è la distanza di Chebyshev: moltiplicata per
+# il costo minimo di un passo è ammissibile e consistente. Manhattan e ottile contano le
+# diagonali come più lunghe di un passo e su questo modello sovrastimano.
+# Con più goal h è il minimo sui goal raggiungibili dallo start: ogni termine è ammissibile
+# e consistente verso il suo goal, quindi lo è anche il minimo verso il goal più vicino.
+# Con tanti goal Chebyshev si precalcola una volta per tutte le celle (campo di distanze).
+INF = float('inf')
+SQRT2_MINUS_1 = 2 ** 0.5 - 1
+FIELD_GOALS = 8  # oltre questi goal Chebyshev usa il campo precalcolato
+
+def manhattan_heuristic(pos, goal):
+    return abs(pos[0] - goal[0]) + abs(pos[1] - goal[1])
+
+def chebyshev_heuristic(pos, goal):
+    return max(abs(pos[0] - goal[0]), abs(pos[1] - goal[1]))
+
+def octile_heuristic(pos, goal):
+    dx, dy = abs(pos[0] - goal[0]), abs(pos[1] - goal[1])
+    return max(dx, dy) + SQRT2_MINUS_1 * min(dx, dy)
+
+HEURISTICS = {
+    "chebyshev": chebyshev_heuristic,
+    "octile": octile_heuristic,
+    "manhattan": manhattan_heuristic,
+}
+ADMISSIBLE = {"chebyshev", "alt"}
+# "alt" usa le tabelle dei landmark precalcolate per il problema (vedi landmarks.py)
+HEURISTIC_NAMES = list(HEURISTICS) + ["alt"]
+
+def min_step_cost(problem):
+    """Costo minimo di un passo tra i terreni effettivamente presenti nel mondo"""
+    grid = getattr(problem, "grid", None)
+    if grid is not None:
+        present = [cost for code, cost in enumerate(problem.cost_by_code)
+                   if code and grid.find(code) != -1]
+        return min(present, default=1)
+    # senza griglia non sappiamo quali terreni ci sono: le celle senza terreno costano 1
+    return min(list(problem.costs.values()) + [1])
+
+def make_heuristic(heuristic, problem, reverse=False):
+    """
+    Restituisce h(pos, goal). Un nome del registro viene scalato per il costo minimo
+    del passo in problem; una funzione viene usata così com'è.
+    Con reverse=True restituisce h(pos, source), che stima il costo da source a pos:
+    le distanze del registro sono simmetriche, ALT no (e una funzione si assume simmetrica).
+    Se problem ha più goal, h(pos, goal) ignora goal e stima il costo verso il più vicino.
+    """
+    goals = getattr(problem, "goals", None)
+    if not reverse and goals is not None and len(goals) != 1:
+        return _multi_goal(heuristic, problem)
+    return _single_goal(heuristic, problem, reverse)
+
+def _single_goal(heuristic, problem, reverse=False):
+    if callable(heuristic):
+        return heuristic
+    if heuristic == "alt":
+        from landmarks import alt_heuristic
+        return alt_heuristic(problem, reverse=reverse)
+    if heuristic not in HEURISTICS:
+        raise ValueError(f"Euristica sconosciuta: {heuristic}")
+    base = HEURISTICS[heuristic]
+    scale = min_step_cost(problem)
+    if scale == 1:
+        return base
+    return lambda pos, goal: scale * base(pos, goal)
+
+def _multi_goal(heuristic, problem):
+    from components import reachable_goals
+    goals = reachable_goals(problem)  # i goal in altre componenti abbasserebbero solo h
+    grid = getattr(problem, "grid", None)
+    if heuristic == "chebyshev" and len(goals) > FIELD_GOALS and grid is not None:
+        # numero minimo di mosse verso il goal più vicino ignorando i muri, per ogni cella
+        from array import array
+        from wavefront import wave_distances
+        field = wave_distances(problem, [grid.index(*goal) for goal in goals], unit=True, walls=False)
+        field = array('d', (field * min_step_cost(problem)).tobytes())
+        y_lim = grid.y_lim
+        return lambda pos, goal: field[pos[0] * y_lim + pos[1]]
+    h = _single_goal(heuristic, problem)
+    return lambda pos, goal: min((h(pos, g) for g in goals), default=INF)
@@ -0,0 +1,267 @@
+from heapq import heappush, heappop
+
+from a_star import AStar
+from search_problem import SearchProblem
+from search_stats import SearchStats
+
+# Ricerca gerarchica (HPA*): la GridWorld è divisa in cluster quadrati di lato cluster_size.
+# Sui confini tra cluster adiacenti si scelgono le transizioni (coppie di celle libere adiacenti
+# in cluster diversi), dentro ogni cluster si precalcolano i costi tra le sue transizioni.
+# Una query collega start e goal alle transizioni del loro cluster, cerca con A* sul grafo
+# astratto e poi raffina solo i cluster attraversati. Il percorso è quasi ottimo: le
+# transizioni sono un sottoinsieme delle celle di confine.
+#
+# Con le mosse in 8 direzioni si attraversa un confine anche in diagonale e negli angoli:
+#  - ogni tratto di coppie dritte libere dà una transizione (due se lungo);
+#  - una coppia diagonale diventa una transizione se nessuna delle sue righe ha una coppia dritta
+#    (altrimenti è collegata, dentro entrambi i cluster, alla transizione di quel tratto);
+#  - l'angolo tra due cluster in diagonale è una transizione se le due celle sono libere.
+# Così il grafo astratto trova un percorso ogni volta che ne esiste uno.
+LONG_ENTRANCE = 6  # da questa lunghezza un tratto ha due transizioni, agli estremi
+
+class HierarchicalMap:
+    def __init__(self, grid, cost_by_code, cluster_size=16):
+        self.cluster_size = cluster_size
+        self.stats = SearchStats()  # contatori dell'ultima search (A* sul grafo astratto)
+        self.rebuild(grid, cost_by_code)
+
+    def rebuild(self, grid, cost_by_code):
+        """Ricostruisce tutta l'astrazione (serve se cambiano i costi dei terreni)"""
+        self.grid = grid
+        self.cost_by_code = list(cost_by_code)
+        size = self.cluster_size
+        self.cx_lim = -(-grid.x_lim // size)
+        self.cy_lim = -(-grid.y_lim // size)
+        self.borders = {}  # (cluster, cluster) -> [(a, b)] transizioni come indici piatti
+        self.intra = {}    # cluster -> {nodo: {nodo: costo}}
+        for c in self.clusters():
+            for other in self._later_neighbours(c):
+                self.borders[(c, other)] = self._transitions(c, other)
+        for c in self.clusters():
+            self._build_intra(c)
+
+    def clusters(self):
+        return [(cx, cy) for cx in range(self.cx_lim) for cy in range(self.cy_lim)]
+
+    def cluster_of(self, i):
+        x, y = divmod(i, self.grid.y_lim)
+        return x // self.cluster_size, y // self.cluster_size
+
+    def bounds(self, c):
+        size = self.cluster_size
+        return (c[0] * size, min((c[0] + 1) * size, self.grid.x_lim),
+                c[1] * size, min((c[1] + 1) * size, self.grid.y_lim))
+
+    def _later_neighbours(self, c):
+        # ogni confine si calcola una volta sola, dal cluster che viene prima
+        cx, cy = c
+        for other in ((cx, cy + 1), (cx + 1, cy), (cx + 1, cy + 1), (cx + 1, cy - 1)):
+            if 0 <= other[0] < self.cx_lim and 0 <= other[1] < self.cy_lim:
+                yield other
+
+    def _border_keys(self, c):
+        cx, cy = c
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                other = (cx + dx, cy + dy)
+                if (dx or dy) and 0 <= other[0] < self.cx_lim and 0 <= other[1] < self.cy_lim:
+                    yield (c, other) if (c, other) in self.borders else (other, c)
+
+    def _free(self, x, y):
+        return self.grid.cells[x * self.grid.y_lim + y] != 0
+
+    def _transitions(self, a, b):
+        """Transizioni sul confine tra i cluster a e b (b viene dopo a)"""
+        index = self.grid.index
+        ax0, ax1, ay0, ay1 = self.bounds(a)
+        if b[0] != a[0] and b[1] != a[1]:
+            # angolo tra cluster in diagonale
+            x, y = ax1 - 1, (ay1 - 1 if b[1] > a[1] else ay0)
+            nx, ny = x + 1, (y + 1 if b[1] > a[1] else y - 1)
+            if self._free(x, y) and self._free(nx, ny):
+                return [(index(x, y), index(nx, ny))]
+            return []
+        if b[1] != a[1]:
+            # confine verticale: colonna ay1 - 1 in a, ay1 in b, lungo le righe
+            col = ay1 - 1
+            cell = lambda t, side: (t, col + side)
+            t0, t1 = ax0, ax1
+        else:
+            # confine orizzontale: riga ax1 - 1 in a, ax1 in b, lungo le colonne
+            row = ax1 - 1
+            cell = lambda t, side: (row + side, t)
+            t0, t1 = ay0, ay1
+        straight = [self._free(*cell(t, 0)) and self._free(*cell(t, 1)) for t in range(t0, t1)]
+        result = []
+        t = t0
+        while t < t1:
+            if not straight[t - t0]:
+                t += 1
+                continue
+            end = t
+            while end + 1 < t1 and straight[end + 1 - t0]:
+                end += 1
+            picks = (t, end) if end - t + 1 >= LONG_ENTRANCE else ((t + end) // 2,)
+            for p in picks:
+                result.append((index(*cell(p, 0)), index(*cell(p, 1))))
+            t = end + 1
+        for t in range(t0, t1):
+            if straight[t - t0] or not self._free(*cell(t, 0)):
+                continue
+            for u in (t - 1, t + 1):
+                if t0 <= u < t1 and not straight[u - t0] and self._free(*cell(u, 1)):
+                    result.append((index(*cell(t, 0)), index(*cell(u, 1))))
+        return result
+
+    def nodes(self, c):
+        """Celle di transizione del cluster c"""
+        result = set()
+        for key in self._border_keys(c):
+            side = 0 if key[0] == c else 1
+            for pair in self.borders[key]:
+                result.add(pair[side])
+        return result
+
+    def _build_intra(self, c):
+        """Archi uscenti dai nodi di c: verso gli altri nodi di c e attraverso le transizioni"""
+        nodes = self.nodes(c)
+        edges = {}
+        for n in nodes:
+            dist, _ = self.local_search(n, c)
+            edges[n] = {m: dist[m] for m in nodes if m != n and m in dist}
+        cells, cost_by_code = self.grid.cells, self.cost_by_code
+        for key in self._border_keys(c):
+            for a, b in self.borders[key]:
+                if key[1] == c:
+                    a, b = b, a
+                edges[a][b] = cost_by_code[cells[b]]
+        self.intra[c] = edges
+
+    def local_search(self, source, c, reverse=False, target=None):
+        """Dijkstra ristretto al cluster c: (distanze, genitori) per indici piatti"""
+        grid = self.grid
+        cells, cost_by_code, y_lim = grid.cells, self.cost_by_code, grid.y_lim
+        x0, x1, y0, y1 = self.bounds(c)
+        dist, parent = {source: 0}, {source: None}
+        heap = [(0, source)]
+        while heap:
+            d, i = heappop(heap)
+            if d > dist[i]:
+                continue
+            if i == target:
+                break
+            x, y = divmod(i, y_lim)
+            back = d + cost_by_code[cells[i]]
+            for dx, dy, off in grid.offsets:
+                if x0 <= x + dx < x1 and y0 <= y + dy < y1:
+                    j = i + off
+                    code = cells[j]
+                    if code:
+                        nd = back if reverse else d + cost_by_code[code]
+                        if nd < dist.get(j, float('inf')):
+                            dist[j] = nd
+                            parent[j] = i
+                            heappush(heap, (nd, j))
+        return dist, parent
+
+    def update(self, grid, changed):
+        """
+        Aggiorna l'astrazione dopo la modifica delle celle changed [(x, y)], già applicata a grid.
+        Una cella interna cambia solo i costi del suo cluster; una cella di bordo cambia anche
+        le transizioni dei suoi confini, quindi i nodi dei cluster vicini.
+        """
+        self.grid = grid
+        size = self.cluster_size
+        dirty = set()
+        for x, y in changed:
+            c = (x // size, y // size)
+            dirty.add(c)
+            x0, x1, y0, y1 = self.bounds(c)
+            if x in (x0, x1 - 1) or y in (y0, y1 - 1):
+                for key in self._border_keys(c):
+                    self.borders[key] = self._transitions(*key)
+                    dirty.update(key)
+        for c in dirty:
+            self._build_intra(c)
+
+    def search(self, problem):
+        """Restituisce (percorso, esplorati) come astar; esplorati = nodi astratti espansi"""
+        self.stats.start()
+        path, explored = self._search(problem)
+        self.stats.stop()
+        return path, explored
+
+    def _search(self, problem):
+        grid = self.grid
+        index, coords = grid.index, grid.coords
+        start, goal = index(*problem.init), index(*problem.goal)
+        if start == goal:
+            return [problem.init], [problem.init]
+        sc, gc = self.cluster_of(start), self.cluster_of(goal)
+
+        # archi temporanei: start -> nodi del suo cluster, nodi del cluster del goal -> goal
+        extra = {start: {}}
+        forward, _ = self.local_search(start, sc)
+        for n in self.nodes(sc):
+            if n in forward:
+                extra[start][n] = forward[n]
+        dist, _ = self.local_search(goal, gc, reverse=True)
+        for n in self.nodes(gc):
+            if n in dist:
+                extra.setdefault(n, {})[goal] = dist[n]
+        # in avanti: uno start su un muro non si raggiunge all'indietro dal goal
+        if sc == gc and goal in forward:
+            extra[start][goal] = forward[goal]
+
+        abstract = AbstractProblem(self, extra, coords(start), coords(goal))
+        search = AStar()
+        if self.stats.observers:
+            # inoltra solo le espansioni: start e finish sono quelli di questa search
+            search.stats.subscribe(lambda event, _, state: event == "expand" and self.stats.notify(event, state))
+        abstract_path, explored = search.solve(abstract)
+        self.stats.add(search.stats)
+        if not abstract_path:
+            return [], explored
+
+        # raffina un arco alla volta: dentro un cluster con Dijkstra locale, tra cluster è una mossa
+        path = [abstract_path[0]]
+        for u, v in zip(abstract_path, abstract_path[1:]):
+            ui, vi = index(*u), index(*v)
+            c = self.cluster_of(ui)
+            if c != self.cluster_of(vi):
+                path.append(v)
+                continue
+            _, parent = self.local_search(ui, c, target=vi)
+            segment = []
+            while vi != ui:
+                segment.append(coords(vi))
+                vi = parent[vi]
+            path.extend(reversed(segment))
+        return path, explored
+
+
+class AbstractProblem(SearchProblem):
+    """Grafo astratto di una HierarchicalMap visto come SearchProblem sugli stati (x, y)"""
+    def __init__(self, hmap, extra, start, goal):
+        super().__init__(start, goal, None)
+        self.hmap = hmap
+        self.extra = extra
+        self.grid = hmap.grid  # per heuristics.min_step_cost
+        self.cost_by_code = hmap.cost_by_code
+
+    def getSuccessors(self, state):
+        hmap = self.hmap
+        grid = hmap.grid
+        i = grid.index(*state)
+        successors = dict(hmap.intra[hmap.cluster_of(i)].get(i, {}))
+        for j, cost in self.extra.get(i, {}).items():
+            successors[j] = min(cost, successors.get(j, cost))
+        return [(grid.coords(j), cost) for j, cost in successors.items()]
+
+    def isGoal(self, state):
+        return state == self.goal
+
+
+def hpa(problem, cluster_size=16):
+    """HPA* in un colpo solo: costruisce l'astrazione e risponde alla query"""
+    return HierarchicalMap(problem.grid, problem.cost_by_code, cluster_size).search(problem)
@@ -0,0 +1,124 @@
+import time
+
+from heuristics import make_heuristic
+from search_algorithm import SearchAlgorithm
+
+INF = float('inf')
+
+# IDA*: ricerche in profondità con una soglia su f = g + h che cresce a ogni iterazione
+# fino al più piccolo f che l'ha superata. In memoria ci sono solo il percorso corrente e
+# gli iteratori dei successori, quindi la memoria cresce con la lunghezza del percorso e non
+# con le celle raggiungibili. Il prezzo è il tempo: sulla griglia a 8 direzioni gli stessi
+# stati si raggiungono per molti percorsi. Una tabella di trasposizione limitata a table_size
+# stati (il g minimo con cui ogni stato è già stato visitato nell'iterazione) taglia i
+# percorsi peggiori; con table_size=0 è l'IDA* classico. Le iterazioni sono tante quanti i
+# valori distinti di f tra h(start) e l'ottimo: su labirinti lunghi con costi diversi IDA*
+# è lento, e conviene SMA* (sma_star). Gli esplorati restituiti sono quelli dell'ultima
+# iterazione, per non tenere in memoria tutta la storia della ricerca.
+# Come ARA* la ricerca può avere un budget di tempo (time_limit) e di espansioni totali
+# (max_expansions): quando lo esaurisce si ferma senza percorso e lo segna in
+# stats.out_of_budget.
+
+class IDAStar(SearchAlgorithm):
+    DEFAULT_TABLE_SIZE = 1 << 16
+
+    def __init__(self, heuristic="chebyshev", table_size=DEFAULT_TABLE_SIZE, time_limit=None,
+                 max_expansions=None, view=False) -> None:
+        super().__init__(view)
+        self.heuristic = heuristic
+        self.table_size = table_size
+        self.time_limit = time_limit          # secondi, None = nessun limite
+        self.max_expansions = max_expansions  # espansioni totali, None = nessun limite
+        self.iterations = 0
+
+    def solve(self, problem):
+        """
+        Restituisce (percorso, esplorati) come A*: percorso ottimo con euristica ammissibile,
+        nessun percorso se finisce il budget
+        """
+        stats = self.stats
+        stats.start()
+        observers = stats.observers
+        deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        max_expansions = self.max_expansions
+        h = make_heuristic(self.heuristic, problem)
+        init, goal = problem.init, problem.goal
+        table_size = self.table_size
+        explored = []
+        expanded, generated, peak_depth, peak_table = 0, 0, 1, 0
+        self.iterations = 0
+        out_of_budget = False
+        found = []
+
+        threshold = h(init, goal)
+        if problem.isGoal(init):
+            found = [init]
+        while not found and not out_of_budget and threshold < INF:
+            self.iterations += 1
+            next_threshold = INF
+            path = [init]
+            on_path = {init}
+            seen = {init: 0}  # tabella di trasposizione dell'iterazione
+            stack = [(0, iter(problem.getSuccessors(init)))]
+            explored = [init]
+            expanded += 1
+            self.update_expanded(init)
+            if observers:
+                stats.notify("expand", init)
+            while stack:
+                g, successors = stack[-1]
+                for successor, step_cost in successors:
+                    generated += 1
+                    if successor in on_path:
+                        continue
+                    new_g = g + step_cost
+                    f = new_g + h(successor, goal)
+                    if f > threshold:
+                        if f < next_threshold:
+                            next_threshold = f
+                        continue
+                    best = seen.get(successor)
+                    if best is not None and best <= new_g:
+                        continue
+                    if ((max_expansions is not None and expanded >= max_expansions)
+                            or (deadline is not None and not expanded & 255
+                                and time.perf_counter() > deadline)):
+                        out_of_budget = True
+                        break
+                    if best is not None or len(seen) < table_size:
+                        seen[successor] = new_g
+                    path.append(successor)
+                    if problem.isGoal(successor):
+                        found = path
+                        break
+                    on_path.add(successor)
+                    stack.append((new_g, iter(problem.getSuccessors(successor))))
+                    explored.append(successor)
+                    expanded += 1
+                    self.update_expanded(successor)
+                    if observers:
+                        stats.notify("expand", successor)
+                    break
+                else:
+                    on_path.discard(path.pop())
+                    stack.pop()
+                    continue
+                if found or out_of_budget:
+                    break
+                if len(stack) > peak_depth:
+                    peak_depth = len(stack)
+            if len(seen) > peak_table:
+                peak_table = len(seen)
+            threshold = next_threshold
+
+        # frontiera = percorso corrente, chiusi = tabella di trasposizione
+        stats.pushes = stats.pops = stats.expanded = expanded
+        stats.generated = generated
+        stats.peak_frontier, stats.peak_closed = peak_depth, peak_table
+        stats.out_of_budget = out_of_budget
+        stats.stop()
+        return list(found), explored
+
+def ida_star(problem, heuristic="chebyshev", table_size=IDAStar.DEFAULT_TABLE_SIZE, time_limit=None,
+             max_expansions=None):
+    return IDAStar(heuristic, table_size, time_limit, max_expansions).solve(problem)
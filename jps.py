@@ -0,0 +1,106 @@
+from a_star import AStar
+from frontier import HeapFrontier
+from pathfinding_problem import DIRECTIONS
+
+# Jump Point Search per il modello a 8 direzioni di PathfindingProblem con terreni pesati.
+# Arrivando in una cella x dal genitore p = x - d, un vicino di x viene potato se esiste un
+# percorso da p che non passa per x e costa al massimo quanto quello per x; si controllano
+# solo le celle laterali, come in JPS, ma confrontando i costi: un vicino è forzato se la
+# cella laterale che lo collega a p è un muro, è fuori mappa oppure costa più di x.
+# Così un cambio di terreno fa da vicino forzato, i percorsi restano ottimi anche sulle
+# mappe pesate e dentro le regioni di un solo terreno la ricerca salta lungo le direzioni.
+
+def _sign(v):
+    return (v > 0) - (v < 0)
+
+class JPS(AStar):
+    def solve(self, problem):
+        self.grid = problem.grid
+        if self.grid is None:
+            raise ValueError("JPS richiede un World con GridWorld")
+        self.cost_by_code = problem.cost_by_code
+        self.goal = problem.goal
+        return super().solve(problem)
+
+    def cost_at(self, x, y):
+        """Costo per entrare in (x, y), None se muro o fuori mappa"""
+        grid = self.grid
+        if 0 <= x < grid.x_lim and 0 <= y < grid.y_lim:
+            code = grid.cells[x * grid.y_lim + y]
+            if code:
+                return self.cost_by_code[code]
+        return None
+
+    def forced(self, x, y, dx, dy):
+        """Direzioni dei vicini forzati di (x, y) raggiunto muovendosi in direzione (dx, dy)"""
+        if dx and dy:
+            # (vicino, cella laterale che lo collega al genitore)
+            candidates = (((-dx, dy), (-dx, 0)), ((dx, -dy), (0, -dy)))
+        elif dx:
+            candidates = (((dx, 1), (0, 1)), ((dx, -1), (0, -1)))
+        else:
+            candidates = (((1, dy), (1, 0)), ((-1, dy), (-1, 0)))
+        here = None
+        result = []
+        for (nx, ny), (sx, sy) in candidates:
+            if self.cost_at(x + nx, y + ny) is None:
+                continue
+            side = self.cost_at(x + sx, y + sy)
+            if side is not None:
+                if here is None:
+                    here = self.cost_at(x, y)
+                if side <= here:
+                    continue
+            result.append((nx, ny))
+        return result
+
+    def successors(self, problem, node):
+        x, y = node.state
+        parent = node.parent
+        if parent is None:
+            directions = DIRECTIONS
+        else:
+            # vicini naturali rispetto alla direzione di arrivo più quelli forzati
+            dx, dy = _sign(x - parent.state[0]), _sign(y - parent.state[1])
+            if dx and dy:
+                directions = [(dx, dy), (dx, 0), (0, dy)]
+            else:
+                directions = [(dx, dy)]
+            directions += self.forced(x, y, dx, dy)
+        successors = []
+        for dx, dy in directions:
+            jump_point = self.jump(x, y, dx, dy)
+            if jump_point is not None:
+                successors.append(jump_point)
+        return successors
+
+    def jump(self, x, y, dx, dy):
+        """Avanza da (x, y) in direzione (dx, dy) fino al prossimo jump point: ((x, y), costo) o None"""
+        goal = self.goal
+        cost = 0
+        while True:
+            x += dx
+            y += dy
+            step = self.cost_at(x, y)
+            if step is None:
+                return None
+            cost += step
+            if (x, y) == goal or self.forced(x, y, dx, dy):
+                return (x, y), cost
+            if dx and dy and (self.jump(x, y, dx, 0) is not None or self.jump(x, y, 0, dy) is not None):
+                return (x, y), cost
+
+    def extract_path(self, node) -> list:
+        # tra due jump point consecutivi ci si muove in linea retta: riempie le celle saltate
+        jump_points = super().extract_path(node)
+        path = jump_points[:1]
+        for (x, y), (nx, ny) in zip(jump_points, jump_points[1:]):
+            dx, dy = _sign(nx - x), _sign(ny - y)
+            while (x, y) != (nx, ny):
+                x += dx
+                y += dy
+                path.append((x, y))
+        return path
+
+def jps(problem, heuristic="chebyshev", weight=1.0, frontier=HeapFrontier):
+    return JPS(heuristic, frontier, weight).solve(problem)
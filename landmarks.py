@@ -0,0 +1,131 @@
+import json
+import os
+from array import array
+from collections import OrderedDict
+
+import numpy as np
+
+from heuristics import chebyshev_heuristic, min_step_cost
+from wavefront import INF, wave_distances
+
+# Euristica ALT (A*, Landmarks, disuguaglianza Triangolare).
+# Per ogni landmark L si precalcolano con Dijkstra (a fronte d'onda, wavefront) le distanze
+# esatte da L a ogni cella e da ogni cella verso L (servono entrambe: il costo di una mossa
+# dipende dalla cella di arrivo, quindi d(u, v) != d(v, u)). Per la disuguaglianza triangolare
+#     d(v, goal) >= d(L, goal) - d(L, v)    e    d(v, goal) >= d(v, L) - d(goal, L)
+# e il massimo su tutti i landmark è un'euristica ammissibile e consistente.
+# Le tabelle valgono solo per un certo mondo e una certa tabella dei costi:
+# PathfindingProblem.worldKey() fa da chiave sia in memoria sia sul disco.
+
+class LandmarkTable:
+    def __init__(self, key, y_lim, landmarks, dist_from, dist_to, min_cost=1):
+        self.key = key
+        self.y_lim = y_lim
+        self.landmarks = landmarks  # indici piatti
+        self.dist_from = dist_from  # dist_from[k][i] = d(L_k, i)
+        self.dist_to = dist_to      # dist_to[k][i] = d(i, L_k)
+        self.min_cost = min_cost
+
+    @classmethod
+    def build(cls, problem, count=4):
+        """Sceglie count landmark con farthest-point selection: un Dijkstra per landmark e direzione"""
+        grid = problem.grid
+        # il primo landmark è la cella più lontana dallo start, i successivi massimizzano
+        # la distanza minima dai landmark già scelti
+        nearest = wave_distances(problem, [grid.index(*problem.init)])
+        landmarks, dist_from, dist_to = [], [], []
+        for _ in range(count):
+            reachable = np.where(nearest < INF, nearest, 0)
+            best = int(reachable.argmax())  # a parità la cella con l'indice più basso
+            if reachable[best] <= 0:
+                break
+            landmarks.append(best)
+            from_best = wave_distances(problem, [best])
+            dist_from.append(array('d', from_best.tobytes()))
+            dist_to.append(array('d', wave_distances(problem, [best], reverse=True).tobytes()))
+            nearest = from_best if len(landmarks) == 1 else np.minimum(nearest, from_best)
+        return cls(problem.worldKey(), grid.y_lim, landmarks, dist_from, dist_to, min_step_cost(problem))
+
+    def save(self, path):
+        header = {"key": self.key, "y_lim": self.y_lim, "landmarks": self.landmarks,
+                  "min_cost": self.min_cost, "cells": len(self.dist_from[0]) if self.dist_from else 0}
+        with open(path, "wb") as f:
+            f.write(json.dumps(header).encode() + b"\n")
+            for table in self.dist_from + self.dist_to:
+                table.tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            tables = []
+            for _ in range(2 * len(header["landmarks"])):
+                table = array('d')
+                table.fromfile(f, header["cells"])
+                tables.append(table)
+        k = len(header["landmarks"])
+        return cls(header["key"], header["y_lim"], header["landmarks"], tables[:k], tables[k:], header["min_cost"])
+
+    def heuristic(self, pos, goal):
+        y_lim = self.y_lim
+        i, t = pos[0] * y_lim + pos[1], goal[0] * y_lim + goal[1]
+        h = self.min_cost * chebyshev_heuristic(pos, goal)
+        for d_from, d_to in zip(self.dist_from, self.dist_to):
+            lg, li = d_from[t], d_from[i]
+            if lg < INF and li < INF and lg - li > h:
+                h = lg - li
+            il, gl = d_to[i], d_to[t]
+            if il < INF and gl < INF and il - gl > h:
+                h = il - gl
+        return h
+
+    def reverse_heuristic(self, pos, source):
+        """Stima ammissibile di d(source, pos), per le ricerche all'indietro"""
+        y_lim = self.y_lim
+        i, s = pos[0] * y_lim + pos[1], source[0] * y_lim + source[1]
+        h = self.min_cost * chebyshev_heuristic(pos, source)
+        for d_from, d_to in zip(self.dist_from, self.dist_to):
+            li, ls = d_from[i], d_from[s]
+            if li < INF and ls < INF and li - ls > h:
+                h = li - ls  # d(s, v) >= d(L, v) - d(L, s)
+            sl, il = d_to[s], d_to[i]
+            if sl < INF and il < INF and sl - il > h:
+                h = sl - il  # d(s, v) >= d(s, L) - d(v, L)
+        return h
+
+
+# worldKey -> LandmarkTable già calcolate in questa sessione, dalla meno recente. Ogni voce
+# occupa 2 * count tabelle grandi quanto la griglia e nella GUI ogni modifica della mappa o
+# dei costi cambia la chiave: se ne tengono solo le ultime MAX_TABLES.
+MAX_TABLES = 2
+_tables = OrderedDict()
+
+def get_landmarks(problem, path=None, count=4):
+    """
+    Restituisce le tabelle ALT per problem: dalla memoria, dal file path se la chiave
+    corrisponde, altrimenti le ricalcola (e le salva su path).
+    """
+    key = problem.worldKey()
+    table = _tables.get(key)
+    if table is not None:
+        _tables.move_to_end(key)
+        return table
+    if path and os.path.exists(path):
+        try:
+            table = LandmarkTable.load(path)
+        except (OSError, ValueError, KeyError, EOFError):
+            table = None
+        if table is not None and table.key != key:
+            table = None  # mappa o costi cambiati: tabelle non più valide
+    if table is None:
+        table = LandmarkTable.build(problem, count)
+        if path:
+            table.save(path)
+    _tables[key] = table
+    while len(_tables) > MAX_TABLES:
+        _tables.popitem(last=False)
+    return table
+
+def alt_heuristic(problem, path=None, reverse=False):
+    table = get_landmarks(problem, path)
+    return table.reverse_heuristic if reverse else table.heuristic
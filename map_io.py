@@ -0,0 +1,184 @@
+import json
+import mmap
+import string
+import struct
+
+from tiled_world import DEFAULT_MAX_BYTES, TiledGrid, TiledWorld
+from world import GridWorld, World, WALL, PLAIN
+
+# Formato testuale delle mappe salvate dalla GUI.
+# La prima riga è un'intestazione JSON (formato, versione, dimensioni, terreni e costi),
+# poi una riga di testo per ogni riga della griglia con un carattere per cella:
+#   '#' muro, '.' cella libera senza terreno, 'a', 'b', ... il terreno in quella posizione
+#   della lista "terrain" dell'intestazione.
+MAP_FORMAT = "funghi-map"
+MAP_VERSION = 1
+WALL_CHAR = "#"
+PLAIN_CHAR = "."
+TERRAIN_CHARS = string.ascii_letters + string.digits
+
+def save_map(path, grid: GridWorld, costs: dict):
+    """Salva la GridWorld e la tabella dei costi nel formato testuale"""
+    names = grid.terrain_names[2:]
+    if len(names) > len(TERRAIN_CHARS):
+        raise ValueError("Troppi tipi di terreno per il formato testuale")
+    header = {"format": MAP_FORMAT, "version": MAP_VERSION,
+              "rows": grid.x_lim, "cols": grid.y_lim,
+              "terrain": names, "costs": dict(costs)}
+    table = bytes(ord(c) for c in WALL_CHAR + PLAIN_CHAR + TERRAIN_CHARS[:len(names)])
+    text = bytes(grid.cells).translate(table.ljust(256, b"?")).decode("ascii")
+    with open(path, "w") as f:
+        f.write(json.dumps(header) + "\n")
+        for x in range(grid.x_lim):
+            f.write(text[x * grid.y_lim:(x + 1) * grid.y_lim] + "\n")
+
+def _magic(path):
+    with open(path, "rb") as f:
+        return f.read(len(BINARY_MAGIC))
+
+def load_map(path, writable=False):
+    """Legge una mappa salvata, testuale o binaria: restituisce (GridWorld, costi)"""
+    magic = _magic(path)
+    if magic == TILED_MAGIC:
+        raise ValueError(f"{path} è una mappa a tasselli: si apre con load_world o load_tiled_map")
+    if magic == BINARY_MAGIC:
+        return load_binary_map(path, writable)
+    return load_text_map(path)
+
+def load_world(path, writable=False, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Come load_map ma costruisce direttamente il World: (World, costi).
+    Una mappa a tasselli diventa un TiledWorld con al più max_bytes di tasselli in memoria.
+    """
+    if _magic(path) == TILED_MAGIC:
+        return load_tiled_map(path, max_bytes)
+    grid, costs = load_map(path, writable)
+    return World.from_grid(grid), costs
+
+def load_text_map(path):
+    with open(path) as f:
+        header = json.loads(f.readline())
+        if header.get("format") != MAP_FORMAT:
+            raise ValueError(f"{path} non è una mappa salvata")
+        if header.get("version") != MAP_VERSION:
+            raise ValueError(f"Versione della mappa non supportata: {header.get('version')}")
+        x_lim, y_lim, names = header["rows"], header["cols"], header["terrain"]
+        chars = WALL_CHAR + PLAIN_CHAR + TERRAIN_CHARS[:len(names)]
+        table = bytearray(range(256))
+        for code, c in enumerate(chars):
+            table[ord(c)] = code
+        body = "".join(line.rstrip("\n") for line in f)
+    if len(body) != x_lim * y_lim or not set(body) <= set(chars):
+        raise ValueError(f"{path}: celle mancanti o caratteri non validi")
+    cells = bytearray(body.encode("ascii").translate(table))
+    return GridWorld(x_lim, y_lim, cells, names), header["costs"]
+
+def grid_to_rows(grid: GridWorld, plain=0):
+    """Righe come PathfindingGUI.grid (0 = muro, nome del terreno); plain sostituisce le celle senza terreno"""
+    names = list(grid.terrain_names)
+    names[WALL], names[PLAIN] = 0, plain
+    cells, y_lim = grid.cells, grid.y_lim
+    return [[names[code] for code in cells[x * y_lim:(x + 1) * y_lim]] for x in range(grid.x_lim)]
+
+
+# Formato binario (versione 1), per mappe grandi:
+#   intestazione fissa  struct BINARY_HEADER: magic, versione, righe, colonne,
+#                       offset dei dati, lunghezza del JSON
+#   JSON                {"terrain": [...], "costs": {...}} in UTF-8
+#   zeri fino all'offset dei dati
+#   celle               righe * colonne byte, gli stessi codici della GridWorld
+# L'offset dei dati è multiplo di 64 KiB, la granularità di mmap più grande (Windows):
+# così le celle si mappano direttamente dal file senza leggerle, l'apertura di una mappa
+# enorme è immediata e i processi che aprono lo stesso file condividono le pagine.
+BINARY_MAGIC = b"FUNGHIBM"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<8sHHIIII")  # magic, versione, riservato, righe, colonne, offset, len JSON
+BINARY_ALIGN = 65536
+
+def save_binary_map(path, grid: GridWorld, costs: dict):
+    """Salva la GridWorld e la tabella dei costi nel formato binario"""
+    meta = json.dumps({"terrain": grid.terrain_names[2:], "costs": dict(costs)}).encode()
+    offset = -(-(BINARY_HEADER.size + len(meta)) // BINARY_ALIGN) * BINARY_ALIGN
+    with open(path, "wb") as f:
+        f.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 0, grid.x_lim, grid.y_lim, offset, len(meta)))
+        f.write(meta)
+        f.write(bytes(offset - BINARY_HEADER.size - len(meta)))
+        f.write(grid.cells)
+
+def load_binary_map(path, writable=False):
+    """
+    Mappa binaria con le celle mappate in memoria: (GridWorld, costi).
+    Di default la mappa è in sola lettura e condivisa tra i processi; con writable=True
+    è copy-on-write (set_cell modifica solo la copia di questo processo, non il file).
+    """
+    with open(path, "rb") as f:
+        magic, version, _, x_lim, y_lim, offset, meta_len = BINARY_HEADER.unpack(f.read(BINARY_HEADER.size))
+        if magic != BINARY_MAGIC:
+            raise ValueError(f"{path} non è una mappa binaria")
+        if version != BINARY_VERSION:
+            raise ValueError(f"Versione della mappa non supportata: {version}")
+        meta = json.loads(f.read(meta_len))
+        size = x_lim * y_lim
+        f.seek(0, 2)
+        if f.tell() < offset + size:
+            raise ValueError(f"{path}: celle mancanti")
+        if size == 0:
+            return GridWorld(x_lim, y_lim, bytearray(), meta["terrain"]), meta["costs"]
+        access = mmap.ACCESS_COPY if writable else mmap.ACCESS_READ
+        cells = mmap.mmap(f.fileno(), size, access=access, offset=offset)
+    return GridWorld(x_lim, y_lim, cells, meta["terrain"]), meta["costs"]
+
+
+# Formato a tasselli (versione 1), per mappe più grandi della memoria (tiled_world):
+#   intestazione fissa  struct TILED_HEADER: magic, versione, righe, colonne, lato del
+#                       tassello, offset dei dati, lunghezza del JSON
+#   JSON e zeri fino all'offset dei dati, come nel formato binario
+#   tasselli            tile * tile byte ciascuno, per righe di tasselli; dentro il tassello
+#                       le celle sono per righe, con muri oltre il bordo della griglia
+# Ogni tassello è un blocco contiguo del file: si legge con una sola read.
+TILED_MAGIC = b"FUNGHITL"
+TILED_VERSION = 1
+TILED_HEADER = struct.Struct("<8sHHIIIII")  # magic, versione, riservato, righe, colonne, tile, offset, len JSON
+DEFAULT_TILE = 256
+
+def save_tiled_map(path, grid: GridWorld, costs: dict, tile=DEFAULT_TILE):
+    """
+    Salva la GridWorld e la tabella dei costi nel formato a tasselli. Si legge una striscia
+    di tile righe alla volta: da una mappa binaria (celle in un mmap) la conversione non
+    porta tutta la griglia in memoria.
+    """
+    x_lim, y_lim = grid.x_lim, grid.y_lim
+    meta = json.dumps({"terrain": grid.terrain_names[2:], "costs": dict(costs)}).encode()
+    offset = -(-(TILED_HEADER.size + len(meta)) // BINARY_ALIGN) * BINARY_ALIGN
+    cells = grid.cells
+    with open(path, "wb") as f:
+        f.write(TILED_HEADER.pack(TILED_MAGIC, TILED_VERSION, 0, x_lim, y_lim, tile, offset, len(meta)))
+        f.write(meta)
+        f.write(bytes(offset - TILED_HEADER.size - len(meta)))
+        for x0 in range(0, x_lim, tile):
+            rows = [cells[x * y_lim:(x + 1) * y_lim] for x in range(x0, min(x0 + tile, x_lim))]
+            for y0 in range(0, y_lim, tile):
+                data = bytearray(tile * tile)  # WALL oltre il bordo
+                for r, row in enumerate(rows):
+                    part = row[y0:y0 + tile]
+                    data[r * tile:r * tile + len(part)] = part
+                f.write(data)
+
+def load_tiled_map(path, max_bytes=DEFAULT_MAX_BYTES):
+    """Mappa a tasselli: (TiledWorld, costi), con al più max_bytes di tasselli in memoria"""
+    f = open(path, "rb")
+    try:
+        magic, version, _, x_lim, y_lim, tile, offset, meta_len = TILED_HEADER.unpack(f.read(TILED_HEADER.size))
+        if magic != TILED_MAGIC:
+            raise ValueError(f"{path} non è una mappa a tasselli")
+        if version != TILED_VERSION:
+            raise ValueError(f"Versione della mappa non supportata: {version}")
+        meta = json.loads(f.read(meta_len))
+        tiles = TiledGrid(f, x_lim, y_lim, tile, offset, meta["terrain"], max_bytes)
+        f.seek(0, 2)
+        if f.tell() < offset + tiles.tile_count * tiles.tile_bytes:
+            raise ValueError(f"{path}: tasselli mancanti")
+    except Exception:
+        f.close()
+        raise
+    return TiledWorld(tiles), meta["costs"]
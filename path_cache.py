@@ -0,0 +1,114 @@
+from collections import OrderedDict
+
+from algorithms import is_optimal, options
+
+# Cache LRU dei risultati delle query: chiave (impronta della griglia, costi per codice,
+# algoritmo, opzioni, start, goal). Le voci valgono per un solo mondo: quando arriva una query
+# con celle o costi diversi la cache si svuota da sola (invalidazione automatica).
+# Un sottopercorso di un percorso ottimo è ottimo a sua volta (i costi sono non negativi),
+# quindi una query a -> b di un algoritmo ottimo si può rispondere con un tratto di un percorso
+# ottimo già in cache che passa prima per a e poi per b. Al contrario no: il costo di una mossa
+# dipende dalla cella di arrivo e le mosse non sono simmetriche.
+# Oltre al numero di voci (maxsize) è limitato il numero totale di celle tenute (max_cells):
+# su una mappa grande gli esplorati di una sola query sono milioni di tuple. Di una voce
+# con più esplorati di max_cells si tiene solo il percorso, come per i sottopercorsi.
+DEFAULT_MAX_CELLS = 1 << 20
+
+class PathCache:
+    def __init__(self, maxsize=256, max_cells=DEFAULT_MAX_CELLS):
+        self.maxsize = maxsize
+        self.max_cells = max_cells
+        self.cells = 0  # celle di percorsi ed esplorati in cache
+        self.entries = OrderedDict()  # chiave -> (percorso, esplorati)
+        self.through = {}  # stato -> {chiave: posizione} sui percorsi ottimi in cache
+        self.world = None  # (digest, costi) del mondo a cui si riferiscono le voci
+        self._pending = (None, None)  # problema dell'ultimo get mancato e la sua impronta
+        self.hits = 0
+        self.subpath_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _check_world(self, problem):
+        # la digest costa un passaggio su tutta la griglia: il put che segue un get mancato
+        # sullo stesso problema riusa quella appena calcolata
+        pending, world = self._pending
+        self._pending = (None, None)
+        if pending is not problem:
+            world = (problem.grid.digest(), tuple(problem.cost_by_code))
+        if world != self.world:
+            if self.entries:
+                self.invalidations += 1
+            self.clear()
+            self.world = world
+
+    def key(self, problem, algorithm, heuristic="chebyshev", weight=1.0):
+        return (algorithm, options(algorithm, heuristic, weight), problem.init, problem.goal)
+
+    def get(self, problem, algorithm, heuristic="chebyshev", weight=1.0):
+        """(percorso, esplorati) dalla cache, None se la query va eseguita"""
+        self._check_world(problem)
+        key = self.key(problem, algorithm, heuristic, weight)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[0]), entry[1]
+        if is_optimal(algorithm, heuristic, weight):
+            path = self._subpath(problem.init, problem.goal)
+            if path is not None:
+                self.subpath_hits += 1
+                return path, []
+        self.misses += 1
+        self._pending = (problem, self.world)
+        return None
+
+    def _subpath(self, start, goal):
+        on_start, on_goal = self.through.get(start), self.through.get(goal)
+        if not on_start or not on_goal:
+            return None
+        if len(on_goal) < len(on_start):
+            candidates = ((k, on_start.get(k), j) for k, j in on_goal.items())
+        else:
+            candidates = ((k, i, on_goal.get(k)) for k, i in on_start.items())
+        for k, i, j in candidates:
+            if i is not None and j is not None and i <= j:
+                self.entries.move_to_end(k)
+                return self.entries[k][0][i:j + 1]
+        return None
+
+    def put(self, problem, algorithm, heuristic, weight, path, explored):
+        self._check_world(problem)
+        key = self.key(problem, algorithm, heuristic, weight)
+        if key in self.entries:
+            self._forget(key)
+        if len(path) + len(explored) > self.max_cells:
+            explored = []  # troppi esplorati: in caso di hit non si rivedono
+        self.entries[key] = (list(path), explored)
+        self.cells += len(path) + len(explored)
+        if path and is_optimal(algorithm, heuristic, weight):
+            for i, state in enumerate(path):
+                self.through.setdefault(state, {})[key] = i
+        while len(self.entries) > 1 and (len(self.entries) > self.maxsize or self.cells > self.max_cells):
+            self._forget(next(iter(self.entries)))
+
+    def _forget(self, key):
+        path, explored = self.entries.pop(key)
+        self.cells -= len(path) + len(explored)
+        for state in path:
+            on_state = self.through.get(state)
+            if on_state is not None:
+                on_state.pop(key, None)
+                if not on_state:
+                    del self.through[state]
+
+    def clear(self):
+        self.entries.clear()
+        self.through.clear()
+        self.cells = 0
+
+    def stats(self):
+        return {"hits": self.hits, "subpath_hits": self.subpath_hits, "misses": self.misses,
+                "invalidations": self.invalidations, "size": len(self.entries), "cells": self.cells}
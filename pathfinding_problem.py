@@ -1,18 +1,58 @@
+import hashlib
+
 from search_problem import SearchProblem
 
 # Movimento in 8 direzioni
 DIRECTIONS = [(-1, 0), (-1, 1), (0, 1), (1, 1),
               (1, 0), (1, -1), (0, -1), (-1, -1)]
 
+def goal_cells(goal):
+    """Tupla delle celle di un goal: una cella (x, y) o una collezione di celle, anche liste da JSON"""
+    cells = list(goal)
+    if isinstance(goal, (set, frozenset)) or not cells or isinstance(cells[0], (tuple, list)):
+        return tuple(tuple(cell) for cell in cells)
+    return (tuple(cells),)
+
+def as_goal(goal):
+    """goal in forma hashabile: la cella (x, y) se è una sola, altrimenti la tupla delle celle"""
+    cells = goal_cells(goal)
+    return cells[0] if len(cells) == 1 else cells
+
 class PathfindingProblem(SearchProblem):
     def __init__(self, world, start, goal, costs):
+        # goal è una cella (x, y) oppure una collezione di celle (tupla, lista o set): con più
+        # goal la ricerca si ferma sul primo raggiunto, goal è None e goals li contiene tutti
+        cells = goal_cells(goal)
+        self.goals = frozenset(cells)
+        goal = cells[0] if len(self.goals) == 1 else None
         super().__init__(start, goal, costs)
         self.world = world
         self.costs = costs
+        # Con una GridWorld i costi si leggono per codice terreno invece che per nome
+        self.grid = getattr(world, "grid", None)
+        # Con un TiledWorld le celle si leggono dai tasselli (tiled_world.TiledGrid)
+        self.tiles = getattr(world, "tiles", None)
+        codes = self.grid if self.grid is not None else self.tiles
+        if codes is not None:
+            self.cost_by_code = [costs.get(name, 1) for name in codes.terrain_names]
 
 
     def getSuccessors(self, state):
         successors = []
+        if self.grid is not None:
+            grid = self.grid
+            cells, cost_by_code = grid.cells, self.cost_by_code
+            x_lim, y_lim = grid.x_lim, grid.y_lim
+            x, y = state
+            for dx, dy in DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < x_lim and 0 <= ny < y_lim:
+                    code = cells[nx * y_lim + ny]
+                    if code:
+                        successors.append(((nx, ny), cost_by_code[code]))
+            return successors
+        if self.tiles is not None:
+            return self.tiles.successors(state, self.cost_by_code)
         for dx, dy in DIRECTIONS:
             nx, ny = state[0] + dx, state[1] + dy
             if 0 <= nx < self.world.x_lim and 0 <= ny < self.world.y_lim:
@@ -22,5 +62,39 @@ class PathfindingProblem(SearchProblem):
                     successors.append(((nx, ny), cost))
         return successors
 
+    def getSuccessorsIndex(self, i):
+        """Come getSuccessors ma su indici piatti della GridWorld: lista di (indice, costo)"""
+        grid = self.grid
+        cells, cost_by_code = grid.cells, self.cost_by_code
+        x_lim, y_lim = grid.x_lim, grid.y_lim
+        x, y = divmod(i, y_lim)
+        successors = []
+        for dx, dy, off in grid.offsets:
+            if 0 <= x + dx < x_lim and 0 <= y + dy < y_lim:
+                code = cells[i + off]
+                if code:
+                    successors.append((i + off, cost_by_code[code]))
+        return successors
+
+    def stepCost(self, state):
+        """Costo per entrare nella cella state"""
+        if self.grid is not None:
+            return self.cost_by_code[self.grid.cells[state[0] * self.grid.y_lim + state[1]]]
+        if self.tiles is not None:
+            return self.cost_by_code[self.tiles.code(*state)]
+        return self.costs.get(self.world.get_terrain(*state), 1)
+
+    def getPredecessors(self, state):
+        # Le mosse sono simmetriche ma il costo dipende dalla cella di arrivo:
+        # da ogni vicino libero si entra in state pagando il costo di state
+        cost = self.stepCost(state)
+        return [(predecessor, cost) for predecessor, _ in self.getSuccessors(state)]
+
+    def worldKey(self):
+        """Impronta di (contenuto del mondo, costi dei terreni): cambia se cambia una cella o un costo"""
+        return hashlib.sha1(f"{self.grid.digest()}:{self.cost_by_code}".encode()).hexdigest()
+
     def isGoal(self, state):
-        return state == self.goal
+        if self.goal is not None:
+            return state == self.goal
+        return state in self.goals  # più goal: appartenenza a un frozenset, O(1)
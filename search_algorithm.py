@@ -1,8 +1,12 @@
 import search_problem as SearchProblem
+from components import unreachable
+from search_stats import SearchStats
 
 # È la definizione generale di un algoritmo di ricerca. 
 # È una classe che tiene traccia di quanti nodi sono stati espansi, ha un metodo solve, che dovremo implementare
 class Node:
+    __slots__ = ("state", "parent", "action", "g")
+
     def __init__(self, state, parent = None, action = None, g = 0) -> None:
         self.state = state # State is a pair (x,y)
         self.parent = parent
@@ -14,6 +18,7 @@ class SearchAlgorithm:
         self.expanded = 0
         self.expanded_states = set()
         self.view = view
+        self.stats = SearchStats()  # contatori, tempi e osservatori dell'ultima solve
 
     def solve(self, problem: SearchProblem) -> list:
         raise NotImplementedError()
@@ -46,4 +51,101 @@ class SearchAlgorithm:
         while (node.parent is not None):
             count += 1
             node = node.parent
-        return count
\ No newline at end of file
+        return count
+
+    # come extract_solution ma restituisce gli stati, compreso quello iniziale
+    def extract_path(self, node) -> list:
+        path = []
+        while node is not None:
+            path.append(node.state)
+            node = node.parent
+        path.reverse()
+        return path
+
+
+# Motore comune a A*, UCS, BFS e DFS: la frontiera contiene Node con il puntatore al genitore,
+# quindi ogni push costa O(1) e il percorso si ricostruisce una sola volta quando si trova il goal.
+# Le sottoclassi scelgono la frontiera, la priorità e se riaprire gli stati già espansi.
+# Se le componenti connesse della griglia separano start e goal si risponde subito [].
+# Con più goal (PathfindingProblem.goals) la ricerca si ferma sul primo estratto, che per UCS
+# e A* con euristica consistente è il più vicino; solve_nearest continua la stessa ricerca
+# fino a estrarne k, in ordine di costo.
+class GraphSearch(SearchAlgorithm):
+    reopen = True  # False: uno stato espanso non viene più considerato (BFS, DFS)
+
+    def __init__(self, view = False) -> None:
+        super().__init__(view)
+        self.explored = []
+
+    def new_frontier(self):
+        raise NotImplementedError()
+
+    def priority(self, node, problem):
+        return node.g
+
+    def successors(self, problem, node):
+        return problem.getSuccessors(node.state)
+
+    def solve(self, problem: SearchProblem) -> tuple:
+        """Restituisce (percorso, esplorati) come le funzioni astar, ucs, bfs e dfs"""
+        paths, explored = self.solve_nearest(problem, 1)
+        return (paths[0] if paths else []), explored
+
+    def solve_nearest(self, problem: SearchProblem, k=1) -> tuple:
+        """
+        Restituisce (percorsi, esplorati): i percorsi verso i k goal estratti per primi da una
+        sola ricerca, meno se i goal raggiungibili sono meno di k
+        """
+        self.reset_expanded()
+        stats = self.stats
+        stats.start()
+        observers = stats.observers
+        self.explored = explored = []
+        paths = []
+        if unreachable(problem):
+            stats.stop()
+            return paths, explored
+        reopen = self.reopen
+        frontier = self.new_frontier()
+        root = Node(problem.init)
+        frontier.push(root, self.priority(root, problem))
+        closed = {}  # stato -> g con cui è stato espanso
+        pushes, pops, skipped, generated, peak = 1, 0, 0, 0, 1
+
+        while frontier:
+            node = frontier.pop()
+            pops += 1
+            state = node.state
+            if state in closed and (not reopen or closed[state] <= node.g):
+                skipped += 1
+                continue
+            closed[state] = node.g
+            explored.append(state)
+            self.update_expanded(state)
+            if observers:
+                stats.notify("expand", state)
+
+            if problem.isGoal(state):
+                paths.append(self.extract_path(node))
+                if len(paths) >= k:
+                    break
+
+            successors = self.successors(problem, node)
+            generated += len(successors)
+            for successor, step_cost in successors:
+                g = node.g + step_cost
+                if successor in closed and (not reopen or g >= closed[successor]):
+                    continue
+                child = Node(successor, node, successor, g)
+                frontier.push(child, self.priority(child, problem))
+                pushes += 1
+            if len(frontier) > peak:
+                peak = len(frontier)
+
+        stats.pushes = getattr(frontier, "pushed", pushes)
+        stats.pops, stats.generated = pops, generated
+        stats.stale = skipped + getattr(frontier, "stale", 0)
+        stats.expanded = len(explored)
+        stats.peak_frontier, stats.peak_closed = peak, len(closed)
+        stats.stop()
+        return paths, explored
@@ -9,6 +9,9 @@ class SearchProblem(object):
     
     def getSuccessors(self, state) -> set:
         raise Exception("Not implemented")
+
+    def getPredecessors(self, state) -> set:
+        raise Exception("Not implemented")
   
     def isGoal(self, state) -> bool:
         raise Exception("Not implemented")
@@ -0,0 +1,79 @@
+import time
+import tracemalloc
+
+# Strumentazione comune a tutti gli algoritmi di ricerca.
+# Ogni algoritmo ha un oggetto SearchStats (attributo stats) che azzera in start(), riempie
+# durante la ricerca e chiude in stop(). Gli osservatori si iscrivono con subscribe e ricevono
+# (evento, stats, stato) per gli eventi "start", "expand" e "finish"; gli algoritmi anytime
+# (ARA*) inviano anche "improve" con stato (percorso, costo, bound) per ogni percorso migliore.
+# Gli algoritmi con un budget di tempo o di espansioni (algorithms.BUDGETED) segnano in
+# out_of_budget se la ricerca si è fermata perché l'ha esaurito.
+# Senza osservatori "expand" non costa nulla perché gli algoritmi lo inviano solo se la lista
+# non è vuota.
+
+COUNTERS = ("pushes", "pops", "stale", "generated", "expanded", "peak_frontier", "peak_closed")
+
+class SearchStats:
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory  # True: picco di memoria con tracemalloc (rallenta)
+        self.observers = []
+        self._tracing = False
+        self.reset()
+
+    def reset(self):
+        self.pushes = 0         # inserimenti nella frontiera
+        self.pops = 0           # estrazioni dalla frontiera
+        self.stale = 0          # estrazioni scartate (voce superata o stato già chiuso)
+        self.generated = 0      # successori generati
+        self.expanded = 0       # stati espansi
+        self.peak_frontier = 0  # dimensione massima della frontiera
+        self.peak_closed = 0    # dimensione massima dell'insieme chiuso
+        self.time_ns = 0
+        self.peak_memory = None  # byte, solo con trace_memory
+        self.out_of_budget = False  # ricerca fermata dal budget di tempo o di espansioni
+
+    def subscribe(self, callback):
+        """callback(evento, stats, stato) per "start", "expand" (stato espanso), "improve" e "finish" """
+        self.observers.append(callback)
+
+    def unsubscribe(self, callback):
+        self.observers.remove(callback)
+
+    def notify(self, event, state=None):
+        for callback in self.observers:
+            callback(event, self, state)
+
+    def start(self):
+        self.reset()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        elif self.trace_memory:
+            tracemalloc.reset_peak()
+        self.notify("start")
+        self._t0 = time.perf_counter_ns()
+
+    def stop(self):
+        self.time_ns += time.perf_counter_ns() - self._t0
+        if self.trace_memory:
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            if self._tracing:
+                tracemalloc.stop()
+                self._tracing = False
+        self.notify("finish")
+
+    def add(self, other):
+        """Somma i contatori di other (ricerche annidate, come l'A* astratto di HPA*)"""
+        for name in ("pushes", "pops", "stale", "generated", "expanded"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.peak_frontier = max(self.peak_frontier, other.peak_frontier)
+        self.peak_closed = max(self.peak_closed, other.peak_closed)
+
+    def as_dict(self):
+        result = {name: getattr(self, name) for name in COUNTERS}
+        result["time_ms"] = self.time_ns / 1e6
+        if self.peak_memory is not None:
+            result["peak_memory_kib"] = self.peak_memory / 1024
+        if self.out_of_budget:
+            result["out_of_budget"] = True
+        return result
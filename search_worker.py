@@ -0,0 +1,118 @@
+import queue
+import threading
+import time
+
+from search_stats import SearchStats
+
+# Ricerche in un thread separato, per non bloccare la GUI.
+# Un SearchJob esegue solve(stats) -> (percorso, esplorati) iscrivendosi come osservatore di
+# stats: riceve gli stati espansi man mano (tutti gli algoritmi del registro inviano "expand")
+# e, se è stato annullato, interrompe la ricerca alla prima espansione successiva.
+# Chi aspetta il risultato legge gli stati a lotti con poll() oppure con il generatore steps():
+#
+#     job = SearchWorker().submit(lambda stats: run(problem, "A*", stats=stats))
+#     for batch in job.steps():
+#         ...                      # stati espansi dall'ultimo lotto
+#     path, explored = job.result  # None se annullata
+#
+# Le fasi che non espandono stati (costruzione dell'astrazione di HPA*, tabelle ALT)
+# non si interrompono: l'annullamento vale dalla prima espansione.
+
+class SearchCancelled(Exception):
+    pass
+
+class SearchJob:
+    def __init__(self, solve, stats=None):
+        self.solve = solve
+        self.stats = stats if stats is not None else SearchStats()
+        self.expanded = []      # stati espansi finora, nell'ordine delle notifiche
+        self.improvements = []  # (percorso, costo, bound) degli algoritmi anytime, in ordine
+        self.result = None      # (percorso, esplorati) a ricerca conclusa
+        self.error = None       # eccezione della ricerca, se è fallita
+        self.cancelled = False
+        self.time_ns = 0        # tempo di solve, compresa la preparazione
+        self.finished = threading.Event()
+        self._seen = 0
+
+    @property
+    def done(self):
+        return self.finished.is_set()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _observe(self, event, stats, state):
+        if event == "expand":
+            self.expanded.append(state)
+            if self.cancelled:
+                raise SearchCancelled()
+        elif event == "improve":
+            self.improvements.append(state)
+
+    def run(self):
+        """Esegue la ricerca nel thread corrente"""
+        self.stats.subscribe(self._observe)
+        start = time.perf_counter_ns()
+        try:
+            if self.cancelled:
+                raise SearchCancelled()
+            self.result = self.solve(self.stats)
+        except SearchCancelled:
+            pass
+        except Exception as e:
+            self.error = e
+        finally:
+            self.time_ns = time.perf_counter_ns() - start
+            self.stats.unsubscribe(self._observe)
+            self.finished.set()
+
+    def poll(self):
+        """Stati espansi dall'ultima chiamata (lista vuota se non ce ne sono di nuovi), senza attendere"""
+        n = len(self.expanded)
+        batch = self.expanded[self._seen:n]
+        self._seen = n
+        return batch
+
+    def steps(self, interval=0.05):
+        """Generatore dei lotti di stati espansi, al più uno ogni interval secondi, fino alla fine"""
+        while not self.finished.wait(interval):
+            batch = self.poll()
+            if batch:
+                yield batch
+        batch = self.poll()
+        if batch:
+            yield batch
+
+class SearchWorker:
+    """
+    Un thread che esegue le ricerche una alla volta, nell'ordine in cui arrivano.
+    Una nuova ricerca annulla quella in corso: le strutture riusate tra una ricerca e l'altra
+    (HPA*, D* Lite, campo di flusso) non vengono mai toccate da due ricerche insieme.
+    """
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.current = None
+        self.thread = threading.Thread(target=self._loop, name="search-worker", daemon=True)
+        self.thread.start()
+
+    def submit(self, solve, stats=None) -> SearchJob:
+        self.cancel()
+        job = SearchJob(solve, stats)
+        self.current = job
+        self.jobs.put(job)
+        return job
+
+    def cancel(self):
+        if self.current is not None:
+            self.current.cancel()
+
+    def close(self):
+        self.cancel()
+        self.jobs.put(None)
+
+    def _loop(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            job.run()
@@ -0,0 +1,231 @@
+import time
+from heapq import heappush, heappop
+from itertools import count
+
+from heuristics import make_heuristic
+from search_algorithm import SearchAlgorithm
+
+INF = float('inf')
+
+# SMA* semplificato: A* sull'albero di ricerca con al più node_budget nodi in memoria.
+# Quando i nodi sono troppi si scarta la foglia peggiore (f più alto, a parità la meno
+# profonda) e il suo f passa al genitore come "dimenticato": il genitore torna in OPEN
+# con quella priorità e, quando viene estratto, rigenera i figli che non ha più in memoria.
+# Così ogni percorso scartato resta rappresentato in OPEN da una stima che non supera il suo
+# costo e il goal estratto per primo è ottimo (con euristica ammissibile e consistente).
+# Un successore già in memoria con g non peggiore non si genera: il percorso migliore verso
+# quello stato lo copre. Il figlio migliore del nodo appena espanso non si scarta subito,
+# così la ricerca avanza sempre. Un successore a profondità budget - 1 che non è il goal non
+# si genera, perché il suo percorso non starebbe in memoria; un nodo che resta senza figli
+# (tutti oltre il budget, morti o coperti da un percorso migliore, che resta rappresentato
+# in OPEN) è morto e il genitore se lo ricorda (al più 8 stati per nodo) per non rigenerarlo.
+# Se il budget è minore della lunghezza del percorso ottimo la ricerca finisce senza percorso;
+# se la supera di poco SMA* rigenera gli stessi nodi un numero di volte che cresce in modo
+# esponenziale (è il suo limite noto), quindi il budget va scelto con margine per i fratelli
+# dei nodi del percorso. Per finire comunque, come ARA* la ricerca ha un budget di tempo
+# (time_limit) e di espansioni (max_expansions); senza nessuno dei due il limite è
+# EXPANSIONS_PER_NODE espansioni per nodo del budget. Quando lo esaurisce si ferma senza
+# percorso e lo segna in stats.out_of_budget.
+
+class _SMANode:
+    __slots__ = ("state", "parent", "g", "f", "depth", "children", "forgotten", "expanded",
+                 "dead", "alive", "ticket", "leaf_ticket")
+
+    def __init__(self, state, parent, g, f, depth):
+        self.state = state
+        self.parent = parent
+        self.g = g
+        self.f = f              # stima del costo minimo attraverso il nodo
+        self.depth = depth
+        self.children = 0       # figli in memoria
+        self.forgotten = INF    # f minimo dei figli scartati
+        self.expanded = False
+        self.dead = ()          # successori da cui il goal non si raggiunge entro il budget
+        self.alive = True
+        self.ticket = None      # voce valida in OPEN
+        self.leaf_ticket = None  # voce valida tra le foglie scartabili
+
+class SMAStar(SearchAlgorithm):
+    DEFAULT_BUDGET = 100_000
+    EXPANSIONS_PER_NODE = 100  # espansioni per nodo del budget se non c'è altro budget
+
+    def __init__(self, heuristic="chebyshev", node_budget=DEFAULT_BUDGET, time_limit=None,
+                 max_expansions=None, view=False) -> None:
+        super().__init__(view)
+        self.heuristic = heuristic
+        self.node_budget = node_budget
+        self.time_limit = time_limit          # secondi, None = nessun limite
+        self.max_expansions = max_expansions  # espansioni totali, None = nessun limite
+        self.dropped = 0  # foglie scartate nell'ultima solve
+
+    def solve(self, problem):
+        """
+        Restituisce (percorso, esplorati): il percorso ottimo e gli stati espansi ancora
+        in memoria alla fine, al più node_budget; nessun percorso se finisce il budget
+        """
+        stats = self.stats
+        stats.start()
+        observers = stats.observers
+        deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        max_expansions = self.max_expansions
+        if max_expansions is None:
+            max_expansions = INF if deadline is not None else self.EXPANSIONS_PER_NODE * self.node_budget
+        heuristic = make_heuristic(self.heuristic, problem)
+        goal = problem.goal
+        budget = self.node_budget
+        counter = count()
+        open_heap = []  # (f, -profondità, n, nodo): a parità di f il più profondo
+        leaves = []     # (-f, profondità, n, nodo): la foglia peggiore in cima
+        best = {}       # stato -> nodo in memoria con il g migliore
+        memory = {}     # n -> nodo, i nodi in memoria
+        pushes = pops = stale = generated = expanded = 0
+        open_size = peak_frontier = peak_closed = 0
+        self.dropped = 0
+
+        def push_open(node, f):
+            nonlocal pushes, open_size
+            if node.ticket is None:
+                open_size += 1
+            node.ticket = next(counter)
+            heappush(open_heap, (f, -node.depth, node.ticket, node))
+            pushes += 1
+
+        def push_leaf(node):
+            node.leaf_ticket = next(counter)
+            heappush(leaves, (-node.f, node.depth, node.leaf_ticket, node))
+
+        def remove(node):
+            nonlocal open_size
+            node.alive = False
+            del memory[id(node)]
+            if best.get(node.state) is node:
+                del best[node.state]
+            if node.ticket is not None:
+                node.ticket = None
+                open_size -= 1
+
+        def remove_dead(node):
+            # nodo senza figli in memoria né dimenticati: il suo sottoalbero non serve più
+            while node is not None and node.children == 0 and node.forgotten == INF:
+                parent = node.parent
+                remove(node)
+                if parent is not None:
+                    parent.children -= 1
+                    parent.dead += (node.state,)
+                    if parent.children == 0 and parent.forgotten != INF:
+                        parent.f = parent.forgotten
+                        if parent.parent is not None:
+                            push_leaf(parent)
+                node = parent
+
+        def drop_worst_leaf(keep):
+            # foglia peggiore, ma non keep (il figlio migliore del nodo appena espanso)
+            nonlocal stale
+            held = leaf = None
+            while leaves:
+                entry = heappop(leaves)
+                candidate = entry[3]
+                if not candidate.alive or candidate.children or candidate.leaf_ticket != entry[2]:
+                    stale += 1
+                elif candidate is keep:
+                    held = entry
+                else:
+                    leaf = candidate
+                    break
+            if held is not None:
+                heappush(leaves, held)
+            if leaf is None:
+                return False
+            parent = leaf.parent
+            remove(leaf)
+            self.dropped += 1
+            parent.children -= 1
+            if leaf.f < parent.forgotten:
+                parent.forgotten = leaf.f
+                push_open(parent, parent.forgotten)
+            if parent.children == 0:
+                if parent.forgotten == INF:
+                    remove_dead(parent)
+                else:
+                    parent.f = parent.forgotten
+                    if parent.parent is not None:
+                        push_leaf(parent)
+            return True
+
+        root = _SMANode(problem.init, None, 0, heuristic(problem.init, goal), 0)
+        memory[id(root)] = root
+        best[root.state] = root
+        push_open(root, root.f)
+        path = []
+
+        while open_heap:
+            f, _, ticket, node = heappop(open_heap)
+            pops += 1
+            if not node.alive or node.ticket != ticket:
+                stale += 1
+                continue
+            node.ticket = None
+            open_size -= 1
+            if problem.isGoal(node.state):
+                while node is not None:
+                    path.append(node.state)
+                    node = node.parent
+                path.reverse()
+                break
+            if expanded >= max_expansions or (deadline is not None and not expanded & 255
+                                              and time.perf_counter() > deadline):
+                stats.out_of_budget = True
+                break
+
+            # espansione (o rigenerazione dei figli dimenticati)
+            node.expanded = True
+            node.forgotten = INF
+            expanded += 1
+            self.update_expanded(node.state)
+            if observers:
+                stats.notify("expand", node.state)
+            successors = problem.getSuccessors(node.state)
+            generated += len(successors)
+            depth = node.depth + 1
+            keep = None
+            for successor, step_cost in successors:
+                g = node.g + step_cost
+                other = best.get(successor)
+                if other is not None and other.g <= g:
+                    continue
+                if successor in node.dead:
+                    continue
+                if depth >= budget - 1 and not problem.isGoal(successor):
+                    node.dead += (successor,)  # il percorso non starebbe nel budget
+                    continue
+                child_f = max(f, g + heuristic(successor, goal))
+                child = _SMANode(successor, node, g, child_f, depth)
+                memory[id(child)] = child
+                best[successor] = child
+                node.children += 1
+                push_open(child, child_f)
+                push_leaf(child)
+                if keep is None or child_f < keep.f:
+                    keep = child
+            if node.children == 0:
+                remove_dead(node)
+            elif node.leaf_ticket is not None:
+                node.leaf_ticket = None  # non è più una foglia
+
+            while len(memory) > budget and drop_worst_leaf(keep):
+                pass
+            if open_size > peak_frontier:
+                peak_frontier = open_size
+            if len(memory) > peak_closed:
+                peak_closed = len(memory)
+
+        explored = [node.state for node in memory.values() if node.expanded]
+        stats.pushes, stats.pops, stats.stale = pushes, pops, stale
+        stats.generated, stats.expanded = generated, expanded
+        stats.peak_frontier, stats.peak_closed = peak_frontier, peak_closed
+        stats.stop()
+        return path, explored
+
+def sma_star(problem, heuristic="chebyshev", node_budget=SMAStar.DEFAULT_BUDGET, time_limit=None,
+             max_expansions=None):
+    return SMAStar(heuristic, node_budget, time_limit, max_expansions).solve(problem)
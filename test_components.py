@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from algorithms import ALGORITHMS, MULTI_GOAL, run
+from benchmark import COSTS, random_map
+from components import reachable_goals, unreachable
+from dijkstra import INF, distances
+from pathfinding_problem import PathfindingProblem
+from world import World
+
+# Il controllo delle componenti prima della ricerca deve dare gli stessi risultati della
+# ricerca senza controllo: da uno start su un muro si esce verso i vicini liberi, mentre
+# un goal su un muro non si raggiunge (salvo quando è lo start).
+
+COSTS_1x3 = {"bianco": 1}
+
+def wall_start_world():
+    return World(1, 3, {(0, 0)}, {(0, 1): "bianco", (0, 2): "bianco"})
+
+def cost(problem, path):
+    return sum(problem.stepCost(state) for state in path[1:]) if path else None
+
+@pytest.mark.parametrize("algorithm", list(ALGORITHMS))
+def test_start_on_wall(algorithm):
+    problem = PathfindingProblem(wall_start_world(), (0, 0), (0, 2), COSTS_1x3)
+    assert not unreachable(problem)
+    assert run(problem, algorithm)[0] == [(0, 0), (0, 1), (0, 2)]
+
+@pytest.mark.parametrize("algorithm", ["A*", "BFS", "UCS"])
+def test_goal_on_wall(algorithm):
+    world = wall_start_world()
+    assert run(PathfindingProblem(world, (0, 2), (0, 0), COSTS_1x3), algorithm)[0] == []
+    assert run(PathfindingProblem(world, (0, 0), (0, 0), COSTS_1x3), algorithm)[0] == [(0, 0)]
+
+def test_reachable_goals_from_wall():
+    world = World(1, 5, {(0, 1), (0, 3)}, {(0, 0): "bianco", (0, 2): "bianco", (0, 4): "bianco"})
+    problem = PathfindingProblem(world, (0, 1), [(0, 0), (0, 3), (0, 4)], COSTS_1x3)
+    assert reachable_goals(problem) == [(0, 0)]
+    problem = PathfindingProblem(world, (0, 3), [(0, 0), (0, 4)], COSTS_1x3)
+    assert reachable_goals(problem) == [(0, 4)]
+
+@pytest.mark.parametrize("seed", range(4))
+def test_wall_starts_match_dijkstra(seed):
+    grid = random_map(30, seed)
+    world = World.from_grid(grid)
+    rng = random.Random(seed)
+    walls = [(x, y) for x in range(grid.x_lim) for y in range(grid.y_lim) if grid.is_wall(x, y)]
+    free = [(x, y) for x in range(grid.x_lim) for y in range(grid.y_lim) if not grid.is_wall(x, y)]
+    for start in rng.sample(walls, 10):
+        goal = rng.choice(free)
+        problem = PathfindingProblem(world, start, goal, COSTS)
+        expected = distances(problem, [grid.index(*start)])[grid.index(*goal)]
+        expected = None if expected == INF else expected
+        for algorithm in ("A*", "UCS", "FLOW"):
+            assert cost(problem, run(problem, algorithm)[0]) == expected
+        goals = rng.sample(free, 3)
+        problem = PathfindingProblem(world, start, goals, COSTS)
+        dist = distances(problem, [grid.index(*start)])
+        reachable = [goal for goal in goals if dist[grid.index(*goal)] != INF]
+        assert sorted(reachable_goals(problem)) == sorted(reachable)
+        for algorithm in sorted(MULTI_GOAL - {"DFS"}):
+            path = run(problem, algorithm)[0]
+            assert bool(path) == bool(reachable)
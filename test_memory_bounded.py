@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+from algorithms import run
+from benchmark import COSTS, _corners, random_map
+from pathfinding_problem import PathfindingProblem
+from search_stats import SearchStats
+from sma_star import SMAStar
+from world import World
+
+# IDA* e SMA* con budget: la ricerca deve finire anche quando il budget di nodi di SMA*
+# è minore dei chiusi di A* e gli stessi nodi si rigenerano moltissime volte.
+
+def problem(n, seed=0):
+    grid = random_map(n, seed)
+    return PathfindingProblem(World.from_grid(grid), *_corners(grid), COSTS)
+
+def cost(problem, path):
+    return sum(problem.stepCost(state) for state in path[1:]) if path else None
+
+def astar_closed(problem):
+    stats = SearchStats()
+    path, _ = run(problem, "A*", stats=stats)
+    return cost(problem, path), stats.peak_closed
+
+def test_sma_below_closed_size_is_optimal():
+    p = problem(30)
+    optimum, closed = astar_closed(p)
+    stats = SearchStats()
+    path, _ = run(p, "SMA*", node_budget=closed * 3 // 10, stats=stats)
+    assert cost(p, path) == optimum
+    assert stats.peak_closed <= closed * 3 // 10
+    assert not stats.out_of_budget
+
+def test_sma_thrashing_budget_terminates():
+    p = problem(15)
+    optimum, closed = astar_closed(p)
+    budget = 29  # poco più del percorso: senza limite rigenera milioni di nodi
+    assert optimum is not None and budget < closed
+    search = SMAStar(node_budget=budget)
+    path, _ = search.solve(p)
+    assert path == []
+    assert search.stats.out_of_budget
+    assert search.stats.expanded <= SMAStar.EXPANSIONS_PER_NODE * budget
+
+def test_sma_time_limit_terminates():
+    p = problem(120)
+    _, closed = astar_closed(p)
+    stats = SearchStats()
+    t0 = time.perf_counter()
+    path, _ = run(p, "SMA*", node_budget=closed // 2, time_limit=0.5, stats=stats)
+    assert time.perf_counter() - t0 < 5
+    assert path == [] and stats.out_of_budget
+
+@pytest.mark.parametrize("algorithm", ["IDA*", "SMA*"])
+def test_max_expansions(algorithm):
+    p = problem(120)
+    stats = SearchStats()
+    path, _ = run(p, algorithm, max_expansions=1000, stats=stats)
+    assert path == []
+    assert stats.expanded <= 1000
+    assert stats.as_dict()["out_of_budget"] is True
+
+def test_ida_time_limit_terminates():
+    p = problem(120)
+    stats = SearchStats()
+    t0 = time.perf_counter()
+    run(p, "IDA*", time_limit=0.5, stats=stats)
+    assert time.perf_counter() - t0 < 5
+    assert stats.out_of_budget
+
+def test_budget_rejected_by_other_algorithms():
+    with pytest.raises(ValueError):
+        run(problem(15), "UCS", max_expansions=10)
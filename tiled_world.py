@@ -0,0 +1,138 @@
+from collections import OrderedDict
+
+from pathfinding_problem import DIRECTIONS
+from world import WALL
+
+DEFAULT_MAX_BYTES = 64 << 20  # tetto di memoria dei tasselli residenti (64 MiB)
+MIN_TILES = 4  # una cella e i suoi vicini stanno al più in 4 tasselli
+
+# Mondo a tasselli per mappe più grandi della memoria: la griglia è divisa in tasselli
+# tile x tile salvati uno dopo l'altro in un file (map_io.save_tiled_map) e ogni tassello
+# si legge dal file la prima volta che una ricerca tocca una sua cella. In memoria restano
+# al più max_bytes di tasselli: oltre si scarta quello usato meno di recente (LRU), che se
+# serve di nuovo si rilegge. Così una ricerca su una mappa enorme legge solo i tasselli
+# attorno alla regione esplorata.
+# Dentro un tassello le celle hanno lo stesso ordine della GridWorld (indice = x * tile + y)
+# e gli stessi codici; i tasselli del bordo sono completati con muri fino a tile x tile.
+# L'ultimo tassello usato si tiene a parte: i successori di uno stato sono quasi sempre nel
+# suo tassello, che si legge senza toccare l'LRU. La mappa è in sola lettura.
+
+class TiledGrid:
+    """
+    Celle di una mappa a tasselli, lette dal file quando servono.
+    Ha le dimensioni, i terreni e le letture di cella della GridWorld, ma non l'array piatto
+    cells: gli algoritmi che lo usano (JPS, HPA*, D*LITE, FLOW, NP-*) richiedono una GridWorld.
+    """
+    def __init__(self, file, x_lim, y_lim, tile, offset, terrain_names=(), max_bytes=DEFAULT_MAX_BYTES):
+        self.file = file
+        self.x_lim = x_lim
+        self.y_lim = y_lim
+        self.tile = tile
+        self.offset = offset  # posizione nel file del primo tassello
+        self.tile_bytes = tile * tile
+        self.tiles_y = -(-y_lim // tile)  # tasselli per riga di tasselli
+        self.tile_count = -(-x_lim // tile) * self.tiles_y
+        self.terrain_names = [None, None] + list(terrain_names)
+        self.terrain_codes = {name: code for code, name in enumerate(self.terrain_names) if name is not None}
+        # (dx, dy, spostamento nell'indice dentro il tassello) per ogni direzione
+        self.offsets = [(dx, dy, dx * tile + dy) for dx, dy in DIRECTIONS]
+        self.max_tiles = max(MIN_TILES, max_bytes // self.tile_bytes)
+        self.resident = OrderedDict()  # (tx, ty) -> bytearray, dal meno recente
+        self._last_key, self._last = None, None
+        self.loads = 0      # letture di un tassello dal file
+        self.evictions = 0  # tasselli scartati per restare nel tetto
+        self.touched = set()  # tasselli letti almeno una volta
+
+    def close(self):
+        self.file.close()
+        self.resident.clear()
+        self._last_key, self._last = None, None
+
+    def _tile(self, key):
+        if key == self._last_key:
+            return self._last
+        resident = self.resident
+        data = resident.get(key)
+        if data is None:
+            data = self._load(key)
+        else:
+            resident.move_to_end(key)
+        self._last_key, self._last = key, data
+        return data
+
+    def _load(self, key):
+        resident = self.resident
+        while len(resident) >= self.max_tiles:
+            resident.popitem(last=False)
+            self.evictions += 1
+        tx, ty = key
+        data = bytearray(self.tile_bytes)
+        self.file.seek(self.offset + (tx * self.tiles_y + ty) * self.tile_bytes)
+        if self.file.readinto(data) != self.tile_bytes:
+            raise ValueError(f"Tassello {key} incompleto nel file della mappa")
+        resident[key] = data
+        self.loads += 1
+        self.touched.add(key)
+        return data
+
+    def code(self, x, y):
+        """Codice della cella (x, y), che deve essere nella griglia"""
+        tile = self.tile
+        return self._tile((x // tile, y // tile))[(x % tile) * tile + y % tile]
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.x_lim and 0 <= y < self.y_lim
+
+    def is_wall(self, x, y):
+        return self.code(x, y) == WALL
+
+    def terrain_at(self, x, y):
+        return self.terrain_names[self.code(x, y)]
+
+    def successors(self, state, cost_by_code):
+        """Come PathfindingProblem.getSuccessors: lista di ((x, y), costo) dei vicini non muro"""
+        x, y = state
+        tile = self.tile
+        lx, ly = x % tile, y % tile
+        successors = []
+        if 0 < lx < tile - 1 and 0 < ly < tile - 1:
+            # i vicini sono nello stesso tassello; oltre il bordo della griglia ci sono muri
+            data = self._tile((x // tile, y // tile))
+            i = lx * tile + ly
+            for dx, dy, off in self.offsets:
+                code = data[i + off]
+                if code:
+                    successors.append(((x + dx, y + dy), cost_by_code[code]))
+            return successors
+        x_lim, y_lim = self.x_lim, self.y_lim
+        for dx, dy, _ in self.offsets:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < x_lim and 0 <= ny < y_lim:
+                code = self.code(nx, ny)
+                if code:
+                    successors.append(((nx, ny), cost_by_code[code]))
+        return successors
+
+    def resident_bytes(self):
+        return len(self.resident) * self.tile_bytes
+
+    def counters(self):
+        """Contatori dei tasselli: letti, distinti, scartati, residenti e totali"""
+        return {"loads": self.loads, "touched": len(self.touched), "evictions": self.evictions,
+                "resident": len(self.resident), "total": self.tile_count}
+
+
+class TiledWorld:
+    """World su una TiledGrid: PathfindingProblem legge i successori dai tasselli"""
+    def __init__(self, tiles: TiledGrid):
+        self.x_lim = tiles.x_lim
+        self.y_lim = tiles.y_lim
+        self.tiles = tiles
+
+    def get_terrain(self, x, y):
+        if not self.tiles.in_bounds(x, y):
+            return None
+        return self.tiles.terrain_at(x, y)
+
+    def close(self):
+        self.tiles.close()
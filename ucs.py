@@ -1,26 +1,13 @@
-from queue import PriorityQueue
+from frontier import HeapFrontier
+from search_algorithm import GraphSearch
 
-def ucs(problem):
-    frontiera = PriorityQueue()
-    frontiera.put((0, problem.init, [problem.init]))  # (costo, stato, percorso)
-    visited = {}
-    explored = []
+class UCS(GraphSearch):
+    def __init__(self, frontier=HeapFrontier, view=False):
+        super().__init__(view)
+        self.frontier = frontier
 
-    while not frontiera.empty():
-        cost, current, path = frontiera.get()
+    def new_frontier(self):
+        return self.frontier()  # priorità = costo del percorso g(n)
 
-        if current in visited and visited[current] <= cost:
-            continue
-
-        visited[current] = cost
-        explored.append(current)
-
-        if problem.isGoal(current):
-            return path, explored
-
-        for successor, step_cost in problem.getSuccessors(current):
-            totale = cost + step_cost
-            if successor not in visited or totale < visited.get(successor, float('inf')):
-                frontiera.put((totale, successor, path + [successor]))
-
-    return [], explored
+def ucs(problem, frontier=HeapFrontier):
+    return UCS(frontier).solve(problem)
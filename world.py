@@ -1,18 +1,218 @@
+import hashlib
+from collections.abc import Mapping, Set
+
+from pathfinding_problem import DIRECTIONS
+
+# Codici riservati nella griglia compatta
+WALL = 0   # cella non attraversabile
+PLAIN = 1  # cella libera senza tipo di terreno (costo di default)
+
+
+class GridWorld:
+    """
+    Griglia compatta: un byte per cella in un bytearray piatto, indice = x * y_lim + y.
+    Il codice 0 è il muro (la maschera dei muri è quindi nello stesso array),
+    il codice 1 è una cella libera senza terreno, dal 2 in poi i tipi di terreno.
+    """
+    def __init__(self, x_lim: int, y_lim: int, cells=None, terrain_names=()):
+        self.x_lim = x_lim
+        self.y_lim = y_lim
+        self.cells = bytearray(x_lim * y_lim) if cells is None else cells
+        # codice -> nome del terreno (None per muro e cella libera)
+        self.terrain_names = [None, None] + list(terrain_names)
+        self.terrain_codes = {name: code for code, name in enumerate(self.terrain_names) if name is not None}
+        # (dx, dy, spostamento nell'indice piatto) per ogni direzione
+        self.offsets = [(dx, dy, dx * y_lim + dy) for dx, dy in DIRECTIONS]
+        self._components = None
+
+    @classmethod
+    def from_sets(cls, x_lim: int, y_lim: int, walls: set, terrain: dict):
+        """Costruisce la griglia dalla rappresentazione a set/dict di World"""
+        names = sorted({t for t in terrain.values() if t is not None})
+        grid = cls(x_lim, y_lim, bytearray([PLAIN]) * (x_lim * y_lim), names)
+        for (x, y), name in terrain.items():
+            if 0 <= x < x_lim and 0 <= y < y_lim and name is not None:
+                grid.cells[x * y_lim + y] = grid.terrain_codes[name]
+        for x, y in walls:
+            if 0 <= x < x_lim and 0 <= y < y_lim:
+                grid.cells[x * y_lim + y] = WALL
+        return grid
+
+    @classmethod
+    def from_rows(cls, rows, terrain_names):
+        """Costruisce la griglia da una lista di righe come PathfindingGUI.grid (0 = muro)"""
+        x_lim = len(rows)
+        y_lim = len(rows[0]) if rows else 0
+        grid = cls(x_lim, y_lim, None, terrain_names)
+        codes = grid.terrain_codes
+        cells = grid.cells
+        for x, row in enumerate(rows):
+            base = x * y_lim
+            for y, terrain in enumerate(row):
+                if terrain:
+                    cells[base + y] = codes.get(terrain, PLAIN)
+        return grid
+
+    def index(self, x, y):
+        return x * self.y_lim + y
+
+    def coords(self, i):
+        return divmod(i, self.y_lim)
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.x_lim and 0 <= y < self.y_lim
+
+    def is_wall(self, x, y):
+        return self.cells[x * self.y_lim + y] == WALL
+
+    def terrain_at(self, x, y):
+        return self.terrain_names[self.cells[x * self.y_lim + y]]
+
+    def set_cell(self, x, y, terrain):
+        """Imposta il terreno di una cella (0 o None = muro), aggiungendo il codice se nuovo"""
+        if not terrain:
+            code = WALL
+        else:
+            code = self.terrain_codes.get(terrain)
+            if code is None:
+                code = len(self.terrain_names)
+                if code > 255:
+                    raise ValueError("Troppi tipi di terreno per la griglia compatta")
+                self.terrain_names.append(terrain)
+                self.terrain_codes[terrain] = code
+        self.cells[x * self.y_lim + y] = code
+        if self._components is not None:
+            self._components.update_cell(x, y, code != WALL)
+
+    @property
+    def components(self):
+        """
+        Componenti connesse delle celle libere (components.ComponentIndex), calcolate al primo
+        uso e aggiornate da set_cell; chi scrive direttamente in cells le ricalcola con rebuild
+        """
+        if self._components is None:
+            from components import ComponentIndex
+            self._components = ComponentIndex(self)
+        return self._components
+
+    @components.setter
+    def components(self, index):
+        self._components = index
+
+    def neighbours(self, i):
+        """Indici piatti delle celle adiacenti non muro"""
+        x, y = divmod(i, self.y_lim)
+        cells = self.cells
+        x_lim, y_lim = self.x_lim, self.y_lim
+        result = []
+        for dx, dy, off in self.offsets:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < x_lim and 0 <= ny < y_lim and cells[i + off]:
+                result.append(i + off)
+        return result
+
+    def find(self, code, start=0):
+        """Primo indice >= start con il codice dato, -1 se non c'è (cells può anche essere un mmap)"""
+        return self.cells.find(bytes((code,)), start)
+
+    def count(self, code):
+        cells = self.cells
+        return cells.count(code) if isinstance(cells, bytearray) else cells[:].count(code)
+
+    def count_walls(self):
+        return self.count(WALL)
+
+    def digest(self):
+        """Impronta del contenuto della griglia (dimensioni, terreni e celle)"""
+        h = hashlib.sha1(f"{self.x_lim}x{self.y_lim}:{self.terrain_names[2:]}".encode())
+        h.update(self.cells)
+        return h.hexdigest()
+
+
+class _WallView(Set):
+    """Vista in sola lettura dei muri come set di tuple (x, y), senza materializzarle"""
+    def __init__(self, grid):
+        self._grid = grid
+
+    def __contains__(self, pos):
+        x, y = pos
+        grid = self._grid
+        return grid.in_bounds(x, y) and grid.cells[x * grid.y_lim + y] == WALL
+
+    def __iter__(self):
+        grid = self._grid
+        start = grid.find(WALL)
+        while start != -1:
+            yield grid.coords(start)
+            start = grid.find(WALL, start + 1)
+
+    def __len__(self):
+        return self._grid.count_walls()
+
+
+class _TerrainView(Mapping):
+    """Vista in sola lettura dei terreni come dict {(x, y): tipo_terreno}"""
+    def __init__(self, grid):
+        self._grid = grid
+
+    def __getitem__(self, pos):
+        x, y = pos
+        grid = self._grid
+        if grid.in_bounds(x, y):
+            name = grid.terrain_at(x, y)
+            if name is not None:
+                return name
+        raise KeyError(pos)
+
+    def __iter__(self):
+        grid = self._grid
+        names = grid.terrain_names
+        for i, code in enumerate(grid.cells):
+            if names[code] is not None:
+                yield grid.coords(i)
+
+    def __len__(self):
+        grid = self._grid
+        return sum(grid.count(code) for code in grid.terrain_codes.values())
+
+
 class World:
     def __init__(self, x_lim: int, y_lim: int, walls: set, terrain: dict):
         self.x_lim = x_lim
         self.y_lim = y_lim
-        self.walls = walls  # set di tuple (x, y)
-        self.terrain = terrain  # dict {(x, y): tipo_terreno}
+        # walls e terrain non sono più salvati come set/dict ma in una GridWorld compatta
+        self.grid = GridWorld.from_sets(x_lim, y_lim, walls, terrain)
+
+    @classmethod
+    def from_grid(cls, grid: GridWorld):
+        world = cls.__new__(cls)
+        world.x_lim = grid.x_lim
+        world.y_lim = grid.y_lim
+        world.grid = grid
+        return world
+
+    @property
+    def components(self):
+        return self.grid.components
+
+    @property
+    def walls(self):
+        return _WallView(self.grid)  # si comporta come un set di tuple (x, y)
+
+    @property
+    def terrain(self):
+        return _TerrainView(self.grid)  # si comporta come un dict {(x, y): tipo_terreno}
 
     def get_terrain(self, x, y):
-        return self.terrain.get((x, y), None)
+        if not self.grid.in_bounds(x, y):
+            return None
+        return self.grid.terrain_at(x, y)
 
     def __str__(self):
         ret = ""
         for x in range(0, self.x_lim):
             for y in range(0, self.y_lim):
-                if (x, y) in self.walls:
+                if self.grid.is_wall(x, y):
                     ret += "%"
                 else:
                     ret += " "